@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_accountlockout_passwordhistory_passwordresettoken'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'is_active'], name='accounts_us_user_ty_029544_idx'),
+        ),
+    ]
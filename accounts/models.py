@@ -47,6 +47,9 @@ class User(AbstractUser):
 
     class Meta:
         db_table = 'accounts_user'
+        indexes = [
+            models.Index(fields=['user_type', 'is_active']),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.user_type})"
@@ -77,6 +77,21 @@ class IsDoctorOrStaff(permissions.BasePermission):
         )
 
 
+class IsAdminOrDoctorOrReadOnly(permissions.BasePermission):
+    """
+    Custom permission to allow any authenticated user to read, but only
+    admins and doctors to create, change or delete.
+    """
+    def has_permission(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return False
+
+        if request.method in permissions.SAFE_METHODS:
+            return True
+
+        return request.user.user_type in ['admin', 'doctor']
+
+
 class IsPatientOwnerOrStaff(permissions.BasePermission):
     """
     Custom permission to allow patient owners or staff to access patient data.
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:05
+
+import hospital_backend.json_encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0006_pricingtier_bundleservice_dynamicpricingrule_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='financialreport',
+            name='report_data',
+            field=models.JSONField(default=dict, encoder=hospital_backend.json_encoders.ORJSONEncoder),
+        ),
+    ]
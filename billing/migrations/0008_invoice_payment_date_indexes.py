@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_recurringpattern_appointment_cancellation_reason_and_more'),
+        ('billing', '0007_financialreport_orjson_encoder'),
+        ('patients', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['invoice_date'], name='billing_inv_invoice_2a056e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'invoice_date'], name='billing_inv_status_f2a322_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='invoice',
+            name='billing_inv_status_541249_idx',
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date'], name='billing_pay_payment_bed741_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'payment_date'], name='billing_pay_status_e52f4e_idx'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.utils import timezone
 from decimal import Decimal
 import uuid
 
+from hospital_backend.json_encoders import ORJSONEncoder
+
 
 class ServiceCategory(models.Model):
     """
@@ -102,8 +104,9 @@ class Invoice(models.Model):
         ordering = ['-invoice_date']
         indexes = [
             models.Index(fields=['patient', 'invoice_date']),
-            models.Index(fields=['status']),
             models.Index(fields=['due_date']),
+            models.Index(fields=['invoice_date']),
+            models.Index(fields=['status', 'invoice_date']),
         ]
 
     def __str__(self):
@@ -218,6 +221,10 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['payment_date']),
+            models.Index(fields=['status', 'payment_date']),
+        ]
 
     def __str__(self):
         return f"{self.payment_number} - ${self.amount}"
@@ -653,7 +660,7 @@ class FinancialReport(models.Model):
     date_to = models.DateField()
 
     # Report data (stored as JSON for flexibility)
-    report_data = models.JSONField(default=dict)
+    report_data = models.JSONField(default=dict, encoder=ORJSONEncoder)
 
     # Status and metadata
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='generating')
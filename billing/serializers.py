@@ -26,6 +26,22 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
         return obj.services.filter(is_active=True).count()
 
 
+class ServiceBulkSerializer(serializers.ListSerializer):
+    """
+    List serializer for bulk service creation
+    """
+
+    def validate(self, attrs):
+        # Each item's unique check only sees the database, not its siblings
+        codes = [item['code'] for item in attrs]
+        duplicates = sorted({code for code in codes if codes.count(code) > 1})
+        if duplicates:
+            raise serializers.ValidationError(
+                f"Duplicate service codes in request: {', '.join(duplicates)}"
+            )
+        return attrs
+
+
 class ServiceSerializer(serializers.ModelSerializer):
     """
     Serializer for medical services
@@ -40,6 +56,7 @@ class ServiceSerializer(serializers.ModelSerializer):
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = ServiceBulkSerializer
     
     def get_category_name(self, obj):
         return obj.category.name
@@ -1,3 +1,58 @@
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+
+from .models import FinancialReport, Service, ServiceCategory
+
+
+class ServiceBulkCreateTest(APITestCase):
+    """POST /billing/services/bulk/"""
+
+    URL = '/api/billing/services/bulk/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(
+            username='admin', email='admin@example.com', password='SecurePass123!', user_type='admin'
+        ))
+        self.category = ServiceCategory.objects.create(name='Laboratory')
+
+    def _service(self, code):
+        return {
+            'category': str(self.category.id), 'name': f'Service {code}', 'code': code,
+            'base_price': '50.00', 'duration_minutes': 15,
+        }
+
+    def test_creates_services(self):
+        response = self.client.post(self.URL, [self._service('LAB1'), self._service('LAB2')], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Service.objects.count(), 2)
+
+    def test_duplicate_codes_in_payload_are_rejected(self):
+        response = self.client.post(self.URL, [self._service('LAB1'), self._service('LAB1')], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Service.objects.exists())
+
+
+class FinancialReportDataTest(TestCase):
+    """report_data holds money as floats, converted by whoever builds the report"""
+
+    def _report(self, summary):
+        return FinancialReport(
+            report_type='revenue_summary', title='Revenue', date_from=date(2025, 1, 1),
+            date_to=date(2025, 1, 31), report_data={'summary': summary}
+        )
+
+    def test_float_amounts_round_trip(self):
+        report = self._report({'total_billed': 1250.5})
+        report.save()
+        report.refresh_from_db()
+        self.assertEqual(report.report_data['summary']['total_billed'], 1250.5)
 
-# Create your tests here.
+    def test_decimal_amounts_are_rejected(self):
+        with self.assertRaises(TypeError):
+            self._report({'total_billed': Decimal('1250.50')}).save()
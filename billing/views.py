@@ -1,6 +1,7 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q, Sum, Count, Avg
 from datetime import datetime, timedelta
@@ -77,6 +78,24 @@ class ServiceViewSet(viewsets.ModelViewSet):
         serializer = ServiceSerializer(services, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create several services in one request
+        """
+        if not isinstance(request.data, list):
+            return Response({'error': 'Expected a list of services'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ServiceSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            services = Service.objects.bulk_create([
+                Service(**item) for item in serializer.validated_data
+            ])
+
+        return Response(ServiceSerializer(services, many=True).data, status=status.HTTP_201_CREATED)
+
 
 @extend_schema(tags=['Billing & Financial Management'])
 class InvoiceViewSet(viewsets.ModelViewSet):
@@ -84,6 +103,8 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     ViewSet for managing invoices
     """
     permission_classes = [permissions.IsAuthenticated]
+    # ?status__in=draft,sent lets clients pick out unpaid invoices server-side
+    filterset_fields = {'status': ['exact', 'in']}
 
     def get_queryset(self):
         """
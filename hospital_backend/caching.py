@@ -9,13 +9,14 @@ from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Optional, Dict, List
 
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.core.cache.backends.redis import RedisCache
 from django.conf import settings
 from django.http import JsonResponse
 from django.utils import timezone
 from django.db.models import QuerySet
 from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.response import Response
 
 import logging
 
@@ -34,6 +35,8 @@ class HospitalCacheManager:
         'user_profile': 900,           # 15 minutes
         'user_permissions': 1800,      # 30 minutes
         'user_session': 3600,          # 1 hour
+        'notification_language': 60,   # 1 minute; bulk writes skip the invalidation signals
+        'notification_language_version': 3600, # 1 hour, outlives the entries it versions
         
         # Patient data
         'patient_profile': 600,        # 10 minutes
@@ -356,6 +359,50 @@ class CacheDecorators:
             return wrapper
         return decorator
 
+    
+    @staticmethod
+    def cache_action(scope: str, timeout: int = 30):
+        """
+        Decorator to cache read-only DRF viewset actions per user and query string.
+        Entries for a scope are dropped together by SmartCacheInvalidation.bump_generation.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(self, request, *args, **kwargs):
+                if request.method != 'GET':
+                    return func(self, request, *args, **kwargs)
+                
+                api_cache = caches['api_cache']
+                generation = SmartCacheInvalidation.get_generation(scope)
+                key_source = '|'.join([
+                    request.get_host(),
+                    request.path,
+                    str(sorted(request.query_params.lists())),
+                    str(request.user.id),
+                    str(generation),
+                ])
+                cache_key = HospitalCacheManager.get_cache_key(
+                    'api', f'action:{scope}',
+                    hashlib.blake2b(key_source.encode('utf-8'), digest_size=16).hexdigest()
+                )
+                
+                cached = api_cache.get(cache_key)
+                if cached is not None:
+                    data, etag = cached
+                    # ConditionalGetMiddleware turns this into a 304 when the client's ETag matches
+                    return Response(data, headers={'ETag': etag} if etag else None)
+                
+                response = func(self, request, *args, **kwargs)
+                
+                # Only cache successful responses
+                if response.status_code == 200:
+                    api_cache.set(cache_key, (response.data, response.get('ETag')), timeout)
+                
+                return response
+            
+            return wrapper
+        return decorator
+
 
 class SessionCacheManager:
     """
@@ -461,6 +508,26 @@ class SmartCacheInvalidation:
         
         return total_invalidated
     
+    @staticmethod
+    def get_generation(scope: str) -> int:
+        """
+        Current generation of a cache scope; cache_action keys include it
+        """
+        return caches['api_cache'].get_or_set(f"hospital:api:generation:{scope}", 1, None)
+    
+    @staticmethod
+    def bump_generation(scope: str) -> None:
+        """
+        Orphan every cached action response in a scope, on any cache backend
+        """
+        api_cache = caches['api_cache']
+        key = f"hospital:api:generation:{scope}"
+        try:
+            api_cache.incr(key)
+        except ValueError:
+            # No generation stored yet; anything cached was keyed with the default of 1
+            api_cache.set(key, 2, None)
+    
     @classmethod
     def invalidate_user_related_cache(cls, user_id: int) -> int:
         """
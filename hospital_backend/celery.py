@@ -0,0 +1,20 @@
+"""
+Celery application for hospital_backend project.
+
+Worker processes are started with:
+    celery -A hospital_backend worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
+
+app = Celery('hospital_backend')
+
+# Read CELERY_* settings from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Discover tasks.py modules in installed apps
+app.autodiscover_tasks()
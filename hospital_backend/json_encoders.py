@@ -0,0 +1,26 @@
+"""
+Fast JSON encoding for model JSONFields
+Uses orjson's C serializer instead of the pure-Python json encoder
+"""
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def _default(obj):
+    """Reject the types orjson does not serialize natively"""
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONEncoder(DjangoJSONEncoder):
+    """
+    JSONField encoder backed by orjson.
+
+    datetime, date, time and UUID values are serialized natively. Decimal
+    is rejected, so producers choose how money is stored; the billing
+    reports convert amounts with float() before saving.
+    """
+
+    OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+    def encode(self, o):
+        return orjson.dumps(o, default=_default, option=self.OPTIONS).decode()
@@ -0,0 +1,13 @@
+"""
+Default pagination for the Hospital Management System API
+"""
+from rest_framework.pagination import PageNumberPagination
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Page number pagination that lets clients shrink or grow the page with ?page_size=
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -2,8 +2,11 @@
 Lightweight Performance Monitoring Middleware
 Optimized for minimal overhead while providing essential metrics
 """
+import io
 import time
 import logging
+import zlib
+from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.db import connection
 from django.conf import settings
@@ -103,6 +106,41 @@ class LightweightPerformanceMiddleware(MiddlewareMixin):
         return request.META.get('REMOTE_ADDR', '')
 
 
+class GzipRequestMiddleware(MiddlewareMixin):
+    """
+    Decompress request bodies sent with Content-Encoding: gzip so parsers see plain data
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        super().__init__(get_response)
+        
+        # Cap on the decompressed size, guards against gzip bombs
+        self.max_body_size = getattr(settings, 'GZIP_REQUEST_MAX_SIZE', settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+    
+    def process_request(self, request):
+        """
+        Swap the compressed body for its decompressed form
+        """
+        if request.META.get('HTTP_CONTENT_ENCODING', '').lower() != 'gzip':
+            return None
+        
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(request.body, self.max_body_size + 1)
+        except zlib.error:
+            return JsonResponse({'error': 'Invalid gzip request body'}, status=400)
+        
+        if len(body) > self.max_body_size or decompressor.unconsumed_tail:
+            return JsonResponse({'error': 'Decompressed request body too large'}, status=413)
+        
+        request._body = body
+        request._stream = io.BytesIO(body)
+        request.META['CONTENT_LENGTH'] = str(len(body))
+        del request.META['HTTP_CONTENT_ENCODING']
+        return None
+
+
 class RequestSizeMiddleware(MiddlewareMixin):
     """
     Monitor request/response sizes for optimization
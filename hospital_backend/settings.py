@@ -68,12 +68,16 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
 
+    # Conditional GET: answer If-None-Match with 304, including for cached pages
+    "django.middleware.http.ConditionalGetMiddleware",
+
     # Caching middleware (add for performance)
     "django.middleware.cache.UpdateCacheMiddleware",
 
     # Session and common middleware
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "hospital_backend.performance_middleware.GzipRequestMiddleware",  # Accept gzip-encoded request bodies
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
 
@@ -344,7 +348,7 @@ REST_FRAMEWORK = {
     #     'medical_records': '200/hour',
     #     'billing': '50/hour',
     # },
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'hospital_backend.pagination.StandardResultsSetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -541,6 +545,8 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Set True to run tasks inline when no worker is available
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
 
 # Apply Security Settings - Disabled for development performance
 # security_settings = get_security_settings(DEBUG)
@@ -734,3 +740,5 @@ SLOW_REQUEST_THRESHOLD = config('SLOW_REQUEST_THRESHOLD', default=2.0, cast=floa
 SLOW_QUERY_THRESHOLD = config('SLOW_QUERY_THRESHOLD', default=1.0, cast=float)
 LARGE_REQUEST_THRESHOLD = config('LARGE_REQUEST_THRESHOLD', default=1048576, cast=int)  # 1MB
 LARGE_RESPONSE_THRESHOLD = config('LARGE_RESPONSE_THRESHOLD', default=5242880, cast=int)  # 5MB
+# Cap on gzip request bodies once decompressed, same limit as an uncompressed body
+GZIP_REQUEST_MAX_SIZE = config('GZIP_REQUEST_MAX_SIZE', default=DATA_UPLOAD_MAX_MEMORY_SIZE, cast=int)
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:37
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_document_counters(apps, schema_editor):
+    MedicalDocument = apps.get_model('medical_records', 'MedicalDocument')
+    DocumentTypeCounter = apps.get_model('medical_records', 'DocumentTypeCounter')
+
+    totals = MedicalDocument.objects.values('document_type').annotate(
+        total=Count('id'),
+        confidential=Count('id', filter=Q(is_confidential=True)),
+        total_bytes=Sum('file_size'),
+    )
+    DocumentTypeCounter.objects.bulk_create([
+        DocumentTypeCounter(
+            document_type=row['document_type'],
+            total=row['total'],
+            confidential=row['confidential'],
+            total_bytes=row['total_bytes'] or 0,
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_records', '0002_criticalcondition_druginteraction_medicalalert_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentTypeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('lab_report', 'Lab Report'), ('imaging', 'Imaging'), ('discharge_summary', 'Discharge Summary'), ('referral', 'Referral'), ('consent_form', 'Consent Form'), ('insurance_document', 'Insurance Document'), ('other', 'Other')], max_length=20, unique=True)),
+                ('total', models.IntegerField(default=0)),
+                ('confidential', models.IntegerField(default=0)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['document_type'],
+            },
+        ),
+        migrations.RunPython(backfill_document_counters, migrations.RunPython.noop),
+    ]
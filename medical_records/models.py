@@ -311,5 +311,25 @@ class MedicalDocument(models.Model):
         return f"{self.title} - {self.document_type}"
 
 
+
+class DocumentTypeCounter(models.Model):
+    """
+    Running document totals per document type, kept current by the signals in
+    medical_records.signals so statistics avoid scanning the documents table
+    """
+    document_type = models.CharField(max_length=20, choices=MedicalDocument.DOCUMENT_TYPES, unique=True)
+    total = models.IntegerField(default=0)
+    confidential = models.IntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['document_type']
+
+    def __str__(self):
+        return f"{self.document_type}: {self.total}"
+
+
 # Import alert models
 from .alert_models import MedicalAlert, PatientAllergy, DrugInteraction, CriticalCondition
@@ -7,6 +7,28 @@ from .models import (
 from .alert_models import MedicalAlert, PatientAllergy, DrugInteraction, CriticalCondition
 
 
+class SparseFieldsetsMixin:
+    """
+    Limit GET output to the comma-separated fields named in ?fields=.
+    Dropped fields are removed before serialization, so their method fields never run.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+        
+        allowed = {name.strip() for name in requested.split(',')}
+        for field_name in set(self.fields) - allowed:
+            self.fields.pop(field_name)
+
+
 class VitalSignsSerializer(serializers.ModelSerializer):
     """
     Serializer for vital signs
@@ -114,7 +136,7 @@ class LabTestSerializer(serializers.ModelSerializer):
         return (timezone.now().date() - obj.ordered_date.date()).days
 
 
-class MedicalDocumentSerializer(serializers.ModelSerializer):
+class MedicalDocumentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for medical documents
     """
@@ -124,12 +146,27 @@ class MedicalDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = MedicalDocument
         fields = [
-            'id', 'title', 'document_type', 'description', 'file', 'file_url',
+            'id', 'medical_record', 'title', 'document_type', 'description', 'file', 'file_url',
             'file_size', 'mime_type', 'uploaded_by', 'uploaded_by_name',
             'upload_date', 'is_confidential', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'file_size', 'mime_type', 'upload_date', 'created_at', 'updated_at']
     
+    def validate_medical_record(self, value):
+        """
+        Only admins and the record's own doctor may attach documents to it
+        """
+        request = self.context.get('request')
+        if request is None:
+            return value
+
+        user = request.user
+        if user.user_type == 'admin':
+            return value
+        if user.user_type == 'doctor' and value.doctor_id == user.doctor_profile.id:
+            return value
+        raise serializers.ValidationError('You do not have access to this medical record.')
+    
     def get_uploaded_by_name(self, obj):
         return obj.uploaded_by.get_full_name() if obj.uploaded_by else None
     
@@ -142,7 +179,7 @@ class MedicalDocumentSerializer(serializers.ModelSerializer):
         return None
 
 
-class MedicalRecordListSerializer(serializers.ModelSerializer):
+class MedicalRecordListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Serializer for medical record list view
     """
@@ -167,13 +204,18 @@ class MedicalRecordListSerializer(serializers.ModelSerializer):
         return obj.doctor.user.get_full_name()
     
     def get_diagnoses_count(self, obj):
+        # Annotated by MedicalRecordViewSet.list
+        if hasattr(obj, 'diagnoses_total'):
+            return obj.diagnoses_total
         return obj.diagnoses.count()
     
     def get_prescriptions_count(self, obj):
+        if hasattr(obj, 'prescriptions_total'):
+            return obj.prescriptions_total
         return obj.prescriptions.count()
 
 
-class MedicalRecordDetailSerializer(serializers.ModelSerializer):
+class MedicalRecordDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Detailed serializer for medical records
     """
@@ -0,0 +1,86 @@
+"""
+Keep DocumentTypeCounter in step with MedicalDocument inserts, edits and deletes,
+and expire cached medical record actions when any medical data changes
+"""
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from hospital_backend.caching import SmartCacheInvalidation
+
+from .models import (
+    MedicalRecord, VitalSigns, Diagnosis, Prescription,
+    LabTest, MedicalDocument, DocumentTypeCounter
+)
+
+# Models feeding the actions wrapped with CacheDecorators.cache_action('medical_records')
+CACHED_ACTION_SOURCES = (MedicalRecord, VitalSigns, Diagnosis, Prescription, LabTest, MedicalDocument)
+
+
+def _adjust_counter(document_type, is_confidential, file_size, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one document from its type's counter.
+    F() expressions keep concurrent uploads from overwriting each other.
+    """
+    DocumentTypeCounter.objects.get_or_create(document_type=document_type)
+    DocumentTypeCounter.objects.filter(document_type=document_type).update(
+        total=F('total') + sign,
+        confidential=F('confidential') + (sign if is_confidential else 0),
+        total_bytes=F('total_bytes') + sign * (file_size or 0),
+        updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=MedicalDocument)
+def remember_counted_document(sender, instance, raw=False, **kwargs):
+    """
+    Capture the stored values an update is about to replace
+    """
+    if raw or instance._state.adding:
+        return
+    instance._counted = MedicalDocument.objects.filter(pk=instance.pk).values(
+        'document_type', 'is_confidential', 'file_size'
+    ).first()
+
+
+@receiver(post_save, sender=MedicalDocument)
+def count_saved_document(sender, instance, created, raw=False, **kwargs):
+    """
+    Count new documents and move edited ones between counters
+    """
+    if raw:
+        return
+
+    previous = None if created else getattr(instance, '_counted', None)
+    current = {
+        'document_type': instance.document_type,
+        'is_confidential': instance.is_confidential,
+        'file_size': instance.file_size,
+    }
+    if previous == current:
+        return
+
+    if previous:
+        _adjust_counter(previous['document_type'], previous['is_confidential'], previous['file_size'], -1)
+    _adjust_counter(instance.document_type, instance.is_confidential, instance.file_size, 1)
+
+
+@receiver(post_delete, sender=MedicalDocument)
+def uncount_deleted_document(sender, instance, **kwargs):
+    """
+    Remove deleted documents from their counter
+    """
+    _adjust_counter(instance.document_type, instance.is_confidential, instance.file_size, -1)
+
+
+def expire_cached_actions(sender, **kwargs):
+    """
+    Drop cached statistics, history, timeline and document listings
+    """
+    SmartCacheInvalidation.bump_generation('medical_records')
+
+
+for model in CACHED_ACTION_SOURCES:
+    post_save.connect(expire_cached_actions, sender=model, dispatch_uid=f'expire_cached_actions_save_{model.__name__}')
+    post_delete.connect(expire_cached_actions, sender=model, dispatch_uid=f'expire_cached_actions_delete_{model.__name__}')
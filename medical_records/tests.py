@@ -1,3 +1,178 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date
 
-# Create your tests here.
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import User, UserActivity
+from doctors.models import Doctor
+from patients.models import Patient
+
+from .models import MedicalAlert, MedicalDocument, MedicalRecord
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_user(username, user_type):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        password='SecurePass123!', user_type=user_type
+    )
+
+
+def create_doctor(username, license_number):
+    return Doctor.objects.create(
+        user=create_user(username, 'doctor'), doctor_id=username.upper(),
+        medical_license_number=license_number, license_expiry_date=date(2030, 1, 1),
+        hire_date=date(2020, 1, 1), consultation_fee='100.00', years_of_experience=5
+    )
+
+
+def create_patient(username):
+    return Patient.objects.create(user=create_user(username, 'patient'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MedicalDocumentUploadPermissionTest(APITestCase):
+    """Uploads must target a medical record the caller may write to"""
+
+    URL = '/api/medical-records/documents/'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.doctor = create_doctor('doc1', 'LIC001')
+        self.other_doctor = create_doctor('doc2', 'LIC002')
+        self.patient = create_patient('pat1')
+        self.other_patient = create_patient('pat2')
+        self.other_record = MedicalRecord.objects.create(
+            patient=self.other_patient, doctor=self.other_doctor, chief_complaint='Headache'
+        )
+        self.own_record = MedicalRecord.objects.create(
+            patient=self.patient, doctor=self.doctor, chief_complaint='Cough'
+        )
+
+    def _payload(self, record):
+        return {
+            'medical_record': str(record.id),
+            'title': 'Lab report',
+            'document_type': 'lab_report',
+            'file': SimpleUploadedFile('report.txt', b'results', content_type='text/plain'),
+        }
+
+    def test_patient_cannot_upload_to_another_patients_record(self):
+        self.client.force_authenticate(self.patient.user)
+        response = self.client.post(self.URL, self._payload(self.other_record), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.post(f'{self.URL}bulk/', self._payload(self.other_record), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(MedicalDocument.objects.exists())
+
+    def test_doctor_cannot_upload_to_another_doctors_record(self):
+        self.client.force_authenticate(self.doctor.user)
+        response = self.client.post(self.URL, self._payload(self.other_record), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('medical_record', response.data)
+
+        response = self.client.post(f'{self.URL}bulk/', self._payload(self.other_record), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MedicalDocument.objects.exists())
+
+    def test_doctor_can_upload_to_own_record(self):
+        self.client.force_authenticate(self.doctor.user)
+        response = self.client.post(self.URL, self._payload(self.own_record), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(MedicalDocument.objects.get().medical_record, self.own_record)
+
+    def test_nurse_cannot_upload(self):
+        self.client.force_authenticate(create_user('nurse1', 'nurse'))
+        response = self.client.post(self.URL, self._payload(self.own_record), format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(MedicalDocument.objects.exists())
+
+    def test_read_only_users_cannot_change_or_delete(self):
+        document = MedicalDocument.objects.create(
+            medical_record=self.own_record, title='Lab report', document_type='lab_report',
+            file=SimpleUploadedFile('report.txt', b'results', content_type='text/plain'),
+            uploaded_by=self.doctor.user
+        )
+        url = f'{self.URL}{document.id}/'
+
+        for user in (self.patient.user, create_user('nurse1', 'nurse')):
+            self.client.force_authenticate(user)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                self.client.patch(url, {'title': 'Changed'}, format='json').status_code,
+                status.HTTP_403_FORBIDDEN
+            )
+            self.assertEqual(
+                self.client.put(url, self._payload(self.own_record), format='multipart').status_code,
+                status.HTTP_403_FORBIDDEN
+            )
+            self.assertEqual(self.client.delete(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        document.refresh_from_db()
+        self.assertEqual(document.title, 'Lab report')
+
+
+class MedicalAlertBulkCreateTest(APITestCase):
+    """A list POST to /medical-records/alerts/ creates the same alerts as single POSTs"""
+
+    URL = '/api/medical-records/alerts/'
+
+    def setUp(self):
+        self.admin = create_user('admin', 'admin')
+        self.patient = create_patient('pat1')
+        self.client.force_authenticate(self.admin)
+
+    def _alert(self, title):
+        return {
+            'patient': str(self.patient.id), 'alert_type': 'allergy', 'severity': 'high',
+            'title': title, 'description': 'Penicillin allergy',
+        }
+
+    def _row_counts(self):
+        return {model._meta.label: model._default_manager.count() for model in apps.get_models()}
+
+    def _rows_written(self, payload):
+        before = self._row_counts()
+        response = self.client.post(self.URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return {
+            label: count - before[label]
+            for label, count in self._row_counts().items() if count != before[label]
+        }
+
+    def test_bulk_create_writes_the_same_rows_as_single_create(self):
+        # bulk_create skips save() and the model signals; any row they add on
+        # the single path has to be written by _bulk_create as well
+        single = self._rows_written(self._alert('Single'))
+        bulk = self._rows_written([self._alert('Bulk')])
+        self.assertEqual(bulk, single)
+        self.assertEqual(single['medical_records.MedicalAlert'], 1)
+
+    def test_bulk_create_matches_single_create(self):
+        single = self.client.post(self.URL, self._alert('Single'), format='json')
+        bulk = self.client.post(self.URL, [self._alert('Bulk 1'), self._alert('Bulk 2')], format='json')
+        self.assertEqual(single.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(bulk.status_code, status.HTTP_201_CREATED)
+
+        alerts = MedicalAlert.objects.all()
+        self.assertEqual(alerts.count(), 3)
+        for alert in alerts:
+            self.assertEqual(alert.triggered_by, self.admin)
+            self.assertEqual(alert.status, 'active')
+            self.assertIsNotNone(alert.updated_at)
+
+        logged = set(UserActivity.objects.filter(
+            resource_type='medical_alert', action='create'
+        ).values_list('resource_id', flat=True))
+        self.assertEqual(logged, {str(alert.id) for alert in alerts})
@@ -2,14 +2,17 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Q, Prefetch, Count, Sum, Avg
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Q, Prefetch, Count, Sum, Avg, Max
 from datetime import datetime, timedelta
+import hashlib
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
 from .models import (
     MedicalRecord, VitalSigns, Diagnosis, Prescription,
-    LabTest, MedicalDocument
+    LabTest, MedicalDocument, DocumentTypeCounter
 )
 from .alert_models import MedicalAlert, PatientAllergy, DrugInteraction, CriticalCondition
 from .serializers import (
@@ -23,11 +26,29 @@ from .serializers import (
 from patients.models import Patient
 from doctors.models import Doctor
 from accounts.models import UserActivity
+from accounts.permissions import IsAdminOrDoctorOrReadOnly
+from hospital_backend.caching import CacheDecorators
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def statistics_etag(queryset):
+    """
+    ETag for a statistics response built from queryset. It changes when rows
+    are added, removed or edited, and daily since the figures cover date windows.
+    """
+    summary = queryset.aggregate(total=Count('id'), last_updated=Max('updated_at'))
+    raw = f"{summary['total']}:{summary['last_updated']}:{timezone.localdate()}"
+    return f'"{hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    """Weak If-None-Match comparison; GZipMiddleware sends our ETags back as W/"..." """
+    client_etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return etag in {client_etag.removeprefix('W/') for client_etag in client_etags}
+
+
 @extend_schema(tags=['Medical Records Management'])
 class MedicalRecordViewSet(viewsets.ModelViewSet):
     """
@@ -36,43 +57,55 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
     serializer_class = MedicalRecordListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # Columns MedicalRecordListSerializer reads; the long free-text fields stay unloaded
+    LIST_ONLY_FIELDS = (
+        'id', 'record_number', 'patient', 'doctor', 'record_type', 'record_date',
+        'chief_complaint', 'is_finalized', 'created_at',
+        'patient__user', 'patient__user__first_name', 'patient__user__last_name',
+        'doctor__user', 'doctor__user__first_name', 'doctor__user__last_name',
+    )
+
     def get_queryset(self):
         """
         Filter medical records based on user role
         """
         user = self.request.user
 
+        queryset = MedicalRecord.objects.select_related('patient__user', 'doctor__user')
+        if self.action == 'list':
+            # The list only shows related counts, so count in SQL instead of prefetching.
+            # Aggregation drops Meta.ordering, so restate it for stable pages
+            queryset = queryset.only(*self.LIST_ONLY_FIELDS).annotate(
+                diagnoses_total=Count('diagnoses', distinct=True),
+                prescriptions_total=Count('prescriptions', distinct=True)
+            ).order_by(*MedicalRecord._meta.ordering)
+        else:
+            # Nested serializers read these users, fetch them with each relation
+            queryset = queryset.select_related('appointment').prefetch_related(
+                Prefetch('vital_signs', queryset=VitalSigns.objects.select_related('recorded_by')),
+                'diagnoses',
+                'prescriptions',
+                Prefetch('lab_tests', queryset=LabTest.objects.select_related(
+                    'ordered_by__user', 'collected_by', 'reported_by'
+                )),
+                Prefetch('documents', queryset=MedicalDocument.objects.select_related('uploaded_by')),
+            )
+
         if user.user_type == 'admin':
             # Admin can see all records
-            return MedicalRecord.objects.select_related(
-                'patient__user', 'doctor__user', 'appointment'
-            ).prefetch_related(
-                'vital_signs', 'diagnoses', 'prescriptions', 'lab_tests', 'documents'
-            ).all()
+            return queryset.all()
 
         elif user.user_type == 'doctor':
             # Doctors can see records they created or are assigned to
-            return MedicalRecord.objects.select_related(
-                'patient__user', 'doctor__user', 'appointment'
-            ).prefetch_related(
-                'vital_signs', 'diagnoses', 'prescriptions', 'lab_tests', 'documents'
-            ).filter(doctor=user.doctor_profile)
+            return queryset.filter(doctor=user.doctor_profile)
 
         elif user.user_type == 'patient':
             # Patients can only see their own records
-            return MedicalRecord.objects.select_related(
-                'patient__user', 'doctor__user', 'appointment'
-            ).prefetch_related(
-                'vital_signs', 'diagnoses', 'prescriptions', 'lab_tests', 'documents'
-            ).filter(patient=user.patient_profile)
+            return queryset.filter(patient=user.patient_profile)
 
         else:
             # Staff can see all records (read-only)
-            return MedicalRecord.objects.select_related(
-                'patient__user', 'doctor__user', 'appointment'
-            ).prefetch_related(
-                'vital_signs', 'diagnoses', 'prescriptions', 'lab_tests', 'documents'
-            ).all()
+            return queryset.all()
 
     def get_serializer_class(self):
         """
@@ -111,6 +144,7 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
             OpenApiParameter('date_from', OpenApiTypes.DATE, description='Filter records from date'),
             OpenApiParameter('date_to', OpenApiTypes.DATE, description='Filter records to date'),
             OpenApiParameter('is_finalized', OpenApiTypes.BOOL, description='Filter by finalization status'),
+            OpenApiParameter('fields', OpenApiTypes.STR, description='Comma-separated fields to return'),
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -174,6 +208,7 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @CacheDecorators.cache_action('medical_records')
     def patient_history(self, request):
         """
         Get complete medical history for a specific patient
@@ -221,6 +256,7 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @CacheDecorators.cache_action('medical_records')
     def timeline(self, request):
         """
         Get medical history timeline for a patient
@@ -395,6 +431,7 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @CacheDecorators.cache_action('medical_records')
     def statistics(self, request):
         """
         Get medical records statistics
@@ -411,6 +448,10 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
         else:
             queryset = MedicalRecord.objects.all()
 
+        etag = statistics_etag(queryset)
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         # Calculate statistics
         total_records = queryset.count()
         finalized_records = queryset.filter(is_finalized=True).count()
@@ -437,7 +478,7 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
                 'count': count
             })
 
-        return Response({
+        response = Response({
             'total_records': total_records,
             'finalized_records': finalized_records,
             'pending_records': total_records - finalized_records,
@@ -446,6 +487,8 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
             'record_types': record_types,
             'recent_activity': recent_activity
         })
+        response['ETag'] = etag
+        return response
 
 
 @extend_schema(tags=['Medical Records Management'])
@@ -840,7 +883,8 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
     ViewSet for managing medical documents and files
     """
     serializer_class = MedicalDocumentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    # Patients and staff have read-only access to documents
+    permission_classes = [permissions.IsAuthenticated, IsAdminOrDoctorOrReadOnly]
 
     def get_queryset(self):
         """
@@ -898,7 +942,63 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Upload several documents in one multipart request.
+        Repeat each metadata field once per file, or send it once to share it.
+        """
+        files = request.FILES.getlist('file')
+        if not files:
+            return Response(
+                {'error': 'At least one file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fields = {key: request.data.getlist(key) for key in request.data if key != 'file'}
+        mismatched = [key for key, values in fields.items() if len(values) not in (1, len(files))]
+        if mismatched:
+            return Response(
+                {'error': f'Fields must be sent once or once per file: {mismatched}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializers_to_save = []
+        for index, uploaded_file in enumerate(files):
+            item = {key: values[index if len(values) > 1 else 0] for key, values in fields.items()}
+            item['file'] = uploaded_file
+            serializer = self.get_serializer(data=item)
+            serializer.is_valid(raise_exception=True)
+            serializers_to_save.append((serializer, uploaded_file))
+
+        with transaction.atomic():
+            documents = [
+                serializer.save(
+                    uploaded_by=request.user,
+                    file_size=uploaded_file.size,
+                    mime_type=uploaded_file.content_type,
+                )
+                for serializer, uploaded_file in serializers_to_save
+            ]
+
+            ip_address = request.META.get('REMOTE_ADDR', '')
+            UserActivity.objects.bulk_create([
+                UserActivity(
+                    user=request.user,
+                    action='upload',
+                    resource_type='medical_document',
+                    resource_id=str(document.id),
+                    description=f'Uploaded document: {document.title}',
+                    ip_address=ip_address,
+                )
+                for document in documents
+            ])
+
+        serializer = self.get_serializer(documents, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
+    @CacheDecorators.cache_action('medical_records')
     def by_patient(self, request):
         """
         Get all documents for a specific patient
@@ -957,6 +1057,7 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @CacheDecorators.cache_action('medical_records')
     def by_type(self, request):
         """
         Get documents filtered by type
@@ -1048,6 +1149,7 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=False, methods=['get'])
+    @CacheDecorators.cache_action('medical_records')
     def statistics(self, request):
         """
         Get document statistics
@@ -1064,9 +1166,32 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
         else:
             queryset = MedicalDocument.objects.all()
 
+        # Everyone else sees every document, so the totals come from the
+        # per-type counters instead of scanning the documents table
+        scoped = user.user_type in ('doctor', 'patient')
+        counters = None if scoped else DocumentTypeCounter.objects.all()
+
+        etag = statistics_etag(queryset if scoped else counters)
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
         # Calculate statistics
-        total_documents = queryset.count()
-        confidential_documents = queryset.filter(is_confidential=True).count()
+        if scoped:
+            total_documents = queryset.count()
+            confidential_documents = queryset.filter(is_confidential=True).count()
+            type_counts = dict(
+                queryset.values_list('document_type').annotate(count=Count('id')).order_by()
+            )
+            total_size = queryset.aggregate(
+                total_size=Sum('file_size')
+            )['total_size'] or 0
+        else:
+            counters = list(counters)
+            total_documents = sum(counter.total for counter in counters)
+            confidential_documents = sum(counter.confidential for counter in counters)
+            type_counts = {counter.document_type: counter.total for counter in counters}
+            total_size = sum(counter.total_bytes for counter in counters)
+
         recent_documents = queryset.filter(
             upload_date__gte=timezone.now() - timedelta(days=30)
         ).count()
@@ -1074,17 +1199,11 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
         # Documents by type
         document_types = {}
         for doc_type, display_name in MedicalDocument.DOCUMENT_TYPES:
-            count = queryset.filter(document_type=doc_type).count()
             document_types[doc_type] = {
                 'name': display_name,
-                'count': count
+                'count': type_counts.get(doc_type, 0)
             }
 
-        # File size statistics
-        total_size = queryset.aggregate(
-            total_size=Sum('file_size')
-        )['total_size'] or 0
-
         # Recent activity (last 7 days)
         recent_activity = []
         for i in range(7):
@@ -1095,7 +1214,7 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
                 'count': count
             })
 
-        return Response({
+        response = Response({
             'total_documents': total_documents,
             'confidential_documents': confidential_documents,
             'public_documents': total_documents - confidential_documents,
@@ -1104,6 +1223,8 @@ class MedicalDocumentViewSet(viewsets.ModelViewSet):
             'document_types': document_types,
             'recent_activity': recent_activity
         })
+        response['ETag'] = etag
+        return response
 
 
 @extend_schema(tags=['Medical Records Management'])
@@ -1635,6 +1756,9 @@ class MedicalAlertViewSet(viewsets.ModelViewSet):
             ).all()
 
     def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self._bulk_create(request)
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -1654,6 +1778,39 @@ class MedicalAlertViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def _bulk_create(self, request):
+        """
+        Create a list of alerts and their activity log entries in one transaction.
+
+        bulk_create skips save() and the model signals. MedicalAlert has no
+        save() override and no signal receivers, so the only side effect of
+        the single-create path is the UserActivity entry, which is written
+        here for every alert (see MedicalAlertBulkCreateTest).
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            alerts = MedicalAlert.objects.bulk_create([
+                MedicalAlert(**{**item, 'triggered_by': request.user})
+                for item in serializer.validated_data
+            ])
+
+            ip_address = request.META.get('REMOTE_ADDR', '')
+            UserActivity.objects.bulk_create([
+                UserActivity(
+                    user=request.user,
+                    action='create',
+                    resource_type='medical_alert',
+                    resource_id=str(alert.id),
+                    description=f'Created medical alert: {alert.title}',
+                    ip_address=ip_address,
+                )
+                for alert in alerts
+            ])
+
+        return Response(self.get_serializer(alerts, many=True).data, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'])
     def acknowledge(self, request, pk=None):
         """
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notificationanalytics_notificationcampaign_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationcampaign',
+            index=models.Index(fields=['status'], name='notificatio_status_203ce8_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_notificationcampaign_notificatio_status_203ce8_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationevent',
+            index=models.Index(fields=['recipient_user', 'event_timestamp', 'event_type'], name='notificatio_recipie_54db54_idx'),
+        ),
+    ]
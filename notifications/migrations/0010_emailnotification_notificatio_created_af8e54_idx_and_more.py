@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_recurringpattern_appointment_cancellation_reason_and_more'),
+        ('billing', '0008_invoice_payment_date_indexes'),
+        ('notifications', '0009_notificationevent_notificatio_recipie_54db54_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailnotification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_af8e54_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pushnotification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_f0385c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smsnotification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_efd0b0_idx'),
+        ),
+    ]
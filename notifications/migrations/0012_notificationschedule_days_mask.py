@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 07:13
+
+from django.db import migrations, models
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def backfill_days_mask(apps, schema_editor):
+    NotificationSchedule = apps.get_model('notifications', 'NotificationSchedule')
+    day_bits = {day: 1 << index for index, day in enumerate(DAYS)}
+
+    schedules = list(NotificationSchedule.objects.all())
+    for schedule in schedules:
+        schedule.days_mask = 0
+        for day in schedule.days_of_week or []:
+            schedule.days_mask |= day_bits.get(day, 0)
+    NotificationSchedule.objects.bulk_update(schedules, ['days_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0011_notificationeventdaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationschedule',
+            name='days_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='days_of_week as a bitmask, Monday = 1 through Sunday = 64; 0 means every day'),
+        ),
+        migrations.RunPython(backfill_days_mask, migrations.RunPython.noop),
+    ]
@@ -164,6 +164,7 @@ class EmailNotification(models.Model):
             models.Index(fields=['recipient_email', 'status']),
             models.Index(fields=['status', 'scheduled_at']),
             models.Index(fields=['template', 'status']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -480,6 +481,7 @@ class SMSNotification(models.Model):
             models.Index(fields=['recipient_phone', 'status']),
             models.Index(fields=['status', 'scheduled_at']),
             models.Index(fields=['template', 'status']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -766,6 +768,7 @@ class PushNotification(models.Model):
             models.Index(fields=['recipient_user', 'status']),
             models.Index(fields=['status', 'scheduled_at']),
             models.Index(fields=['device_type', 'status']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
@@ -1225,6 +1228,7 @@ class NotificationPreference(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # The unique index also serves (user) and (user, type, channel) lookups
         unique_together = ['user', 'notification_type', 'channel']
         ordering = ['user', 'notification_type', 'channel']
         indexes = [
@@ -1367,6 +1371,7 @@ class NotificationBlacklist(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # The unique index also serves exact (user, type, value) lookups
         unique_together = ['user', 'blacklist_type', 'value']
         ordering = ['-created_at']
         indexes = [
@@ -1378,6 +1383,33 @@ class NotificationBlacklist(models.Model):
         return f"{self.user.get_full_name()} - {self.get_blacklist_type_display()}: {self.value}"
 
 
+class NotificationScheduleQuerySet(models.QuerySet):
+    """
+    Keeps days_mask in step with days_of_week on the write paths that skip save()
+    """
+
+    def update(self, **kwargs):
+        # bulk_update passes days_mask itself, as a Case expression
+        if 'days_of_week' in kwargs and 'days_mask' not in kwargs:
+            kwargs['days_mask'] = NotificationSchedule.days_to_mask(kwargs['days_of_week'])
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.days_mask = obj.days_to_mask(obj.days_of_week)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'days_of_week' in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.days_mask = obj.days_to_mask(obj.days_of_week)
+            if 'days_mask' not in fields:
+                fields = [*fields, 'days_mask']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
 class NotificationSchedule(models.Model):
     """
     Custom notification schedules for users
@@ -1420,6 +1452,11 @@ class NotificationSchedule(models.Model):
         default=list,
         help_text="List of days when this schedule is active"
     )
+    days_mask = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="days_of_week as a bitmask, Monday = 1 through Sunday = 64; 0 means every day"
+    )
 
     # Date range
     start_date = models.DateField(null=True, blank=True)
@@ -1439,6 +1476,8 @@ class NotificationSchedule(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = NotificationScheduleQuerySet.as_manager()
+
     class Meta:
         ordering = ['-priority', 'name']
         indexes = [
@@ -1449,6 +1488,22 @@ class NotificationSchedule(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.name} ({self.get_schedule_type_display()})"
 
+    @classmethod
+    def days_to_mask(cls, days) -> int:
+        """Bit i set for each day whose weekday() is i"""
+        day_bits = {day: 1 << index for index, (day, _) in enumerate(cls.DAYS_OF_WEEK)}
+        mask = 0
+        for day in days or []:
+            mask |= day_bits.get(day, 0)
+        return mask
+
+    def save(self, *args, **kwargs):
+        self.days_mask = self.days_to_mask(self.days_of_week)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'days_of_week' in update_fields and 'days_mask' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'days_mask']
+        super().save(*args, **kwargs)
+
 
 class NotificationJob(models.Model):
     """
@@ -1874,6 +1929,7 @@ class NotificationEvent(models.Model):
             models.Index(fields=['event_type', 'event_timestamp']),
             models.Index(fields=['notification_channel', 'event_type']),
             models.Index(fields=['recipient_user', 'event_type']),
+            models.Index(fields=['recipient_user', 'event_timestamp', 'event_type']),
             models.Index(fields=['notification_id']),
         ]
 
@@ -1881,6 +1937,28 @@ class NotificationEvent(models.Model):
         return f"{self.get_event_type_display()} - {self.notification_channel} - {self.event_timestamp}"
 
 
+class NotificationEventDaily(models.Model):
+    """
+    Daily event counts rolled up from NotificationEvent for period reports
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    day = models.DateField()
+    notification_channel = models.CharField(max_length=20)
+    notification_type = models.CharField(max_length=50)
+    event_type = models.CharField(max_length=20, choices=NotificationEvent.EVENT_TYPES)
+    count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        unique_together = ['day', 'notification_channel', 'notification_type', 'event_type']
+
+    def __str__(self):
+        return f"{self.day} - {self.notification_channel} - {self.event_type}: {self.count}"
+
+
 class NotificationCampaign(models.Model):
     """
     Notification campaigns for grouping related notifications
@@ -1947,6 +2025,7 @@ class NotificationCampaign(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['campaign_type', 'status']),
+            models.Index(fields=['status']),
             models.Index(fields=['start_date', 'end_date']),
         ]
 
@@ -1,16 +1,20 @@
 import logging
 import smtplib
+from functools import lru_cache
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 from decimal import Decimal
 from django.conf import settings
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template import Template, Context
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper
+from django.db.models.functions import Cast, Coalesce, NullIf
+from hospital_backend.caching import HospitalCacheManager
 from .models import (
     EmailTemplate, EmailNotification, EmailConfiguration, EmailAnalytics,
     SMSTemplate, SMSNotification, SMSConfiguration, SMSAnalytics,
@@ -19,12 +23,80 @@ from .models import (
     TemplateVariable, TemplateLanguage, UnifiedTemplate, TemplateContent, TemplateUsageLog,
     NotificationPreference, NotificationSettings, NotificationBlacklist, NotificationSchedule,
     NotificationJob, NotificationQueue, CronJob,
-    NotificationAnalytics, NotificationEvent, NotificationCampaign
+    NotificationAnalytics, NotificationEvent, NotificationEventDaily, NotificationCampaign
 )
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=512)
+def _compile_template(source: str) -> Template:
+    """
+    Compile template source once and reuse the parsed node list.
+
+    Stored templates rarely change, so parsing the same source on every
+    render is wasted work; edited templates simply get a new cache entry.
+    """
+    return Template(source)
+
+
+def _language_cache_version(user_id) -> int:
+    return HospitalCacheManager.get_cache('user', 'notification_language_version', str(user_id)) or 0
+
+
+def invalidate_user_language(user_id) -> None:
+    """
+    Move the user's resolved languages to a new cache version, so every
+    process stops reading the old entries
+    """
+    HospitalCacheManager.set_cache(
+        'user', 'notification_language_version', _language_cache_version(user_id) + 1, str(user_id)
+    )
+
+
+def _resolve_language(user_id, notification_type: Optional[str]) -> str:
+    """
+    Resolve a user's notification language: the type-specific preference,
+    then their default setting, then the system default.
+    Cached in the shared cache under a per-user version that
+    notifications.signals bumps on save and delete. Writes that skip the
+    signals (bulk_update, queryset.update, TemplateLanguage edits) are
+    picked up once the short entry timeout runs out.
+    """
+    cache_id = f"{user_id}:{_language_cache_version(user_id)}:{notification_type or ''}"
+    language = HospitalCacheManager.get_cache('user', 'notification_language', cache_id)
+    if language is None:
+        language = _lookup_language(user_id, notification_type)
+        HospitalCacheManager.set_cache('user', 'notification_language', language, cache_id)
+    return language
+
+
+def _lookup_language(user_id, notification_type: Optional[str]) -> str:
+    try:
+        # Check for type-specific language preference
+        if notification_type:
+            preference = NotificationPreference.objects.filter(
+                user_id=user_id,
+                notification_type=notification_type,
+                preferred_language__isnull=False
+            ).select_related('preferred_language').first()
+
+            if preference and preference.preferred_language:
+                return preference.preferred_language.code
+
+        # Check global language setting
+        user_settings = NotificationSettings.objects.select_related('default_language').get(user_id=user_id)
+        if user_settings.default_language:
+            return user_settings.default_language.code
+
+        # Fallback to default system language
+        default_language = TemplateLanguage.objects.filter(is_default=True).first()
+        return default_language.code if default_language else 'en'
+
+    except NotificationSettings.DoesNotExist:
+        return 'en'
+
+
 class EmailTemplateService:
     """
     Service for managing email templates
@@ -36,10 +108,10 @@ class EmailTemplateService:
         Render email template with provided variables
         """
         try:
-            # Create Django template objects
-            subject_template = Template(template.subject_template)
-            html_template = Template(template.html_template)
-            text_template = Template(template.text_template)
+            # Get compiled Django template objects
+            subject_template = _compile_template(template.subject_template)
+            html_template = _compile_template(template.html_template)
+            text_template = _compile_template(template.text_template)
             
             # Create context
             context = Context(variables)
@@ -363,8 +435,8 @@ class SMSTemplateService:
         Render SMS template with provided variables
         """
         try:
-            # Create Django template object
-            message_template = Template(template.message_template)
+            # Get compiled Django template object
+            message_template = _compile_template(template.message_template)
 
             # Create context
             context = Context(variables)
@@ -697,9 +769,9 @@ class PushNotificationTemplateService:
         Render push notification template with provided variables
         """
         try:
-            # Create Django template objects
-            title_template = Template(template.title_template)
-            body_template = Template(template.body_template)
+            # Get compiled Django template objects
+            title_template = _compile_template(template.title_template)
+            body_template = _compile_template(template.body_template)
 
             # Create context
             context = Context(variables)
@@ -1316,7 +1388,7 @@ class UnifiedTemplateService:
                     )
 
                     # Render content
-                    django_template = Template(template_content.content)
+                    django_template = _compile_template(template_content.content)
                     context = Context(formatted_variables)
                     rendered_content[content_type] = django_template.render(context)
 
@@ -1450,18 +1522,29 @@ class NotificationPreferenceService:
             'survey': {'email': False, 'sms': False, 'push': False, 'in_app': True},
         }
 
-        # Create preferences for each notification type and channel
+        # Skip the preferences the user already has so only new rows are returned
+        existing = set(
+            NotificationPreference.objects.filter(user=user).values_list('notification_type', 'channel')
+        )
+
+        # Build preferences for each notification type and channel
         for notification_type, channels in default_config.items():
             for channel, is_enabled in channels.items():
-                preference = NotificationPreference.objects.create(
+                if (notification_type, channel) in existing:
+                    continue
+                default_preferences.append(NotificationPreference(
                     user=user,
                     notification_type=notification_type,
                     channel=channel,
                     is_enabled=is_enabled,
                     frequency='immediate' if is_enabled else 'disabled',
                     priority_threshold='low'
-                )
-                default_preferences.append(preference)
+                ))
+
+        # One multi-row INSERT; conflicts from a concurrent request are ignored
+        NotificationPreference.objects.bulk_create(
+            default_preferences, batch_size=500, ignore_conflicts=True
+        )
 
         return default_preferences
 
@@ -1508,97 +1591,54 @@ class NotificationPreferenceService:
         """
         Check if user wants to receive a specific notification
         """
-        try:
-            # Check global settings first
-            settings = NotificationSettings.objects.get(user=user)
+        return PreferenceEvaluator(user).check(notification_type, channel, priority)
 
-            # Master toggle
-            if not settings.notifications_enabled:
-                return False
-
-            # Channel-specific toggles
-            if channel == 'email' and not settings.email_notifications_enabled:
-                return False
-            elif channel == 'sms' and not settings.sms_notifications_enabled:
-                return False
-            elif channel == 'push' and not settings.push_notifications_enabled:
-                return False
-            elif channel == 'in_app' and not settings.in_app_notifications_enabled:
-                return False
-
-            # Check specific preference
-            try:
-                preference = NotificationPreference.objects.get(
-                    user=user,
-                    notification_type=notification_type,
-                    channel=channel
-                )
-
-                # Check if preference is enabled
-                if not preference.is_enabled:
-                    return False
-
-                # Check priority threshold
-                priority_levels = {'low': 1, 'normal': 2, 'high': 3, 'urgent': 4}
-                user_threshold = priority_levels.get(preference.priority_threshold, 1)
-                notification_priority = priority_levels.get(priority, 2)
-
-                if notification_priority < user_threshold:
-                    return False
-
-                # Check quiet hours
-                if preference.quiet_hours_start and preference.quiet_hours_end:
-                    current_time = timezone.now().time()
-                    if preference.quiet_hours_start <= current_time <= preference.quiet_hours_end:
-                        # Allow urgent notifications during quiet hours
-                        if priority != 'urgent':
-                            return False
-
-                return True
+    @staticmethod
+    def load_blacklist(user) -> Set[Tuple[str, str]]:
+        """
+        Load a user's active blacklist as (blacklist_type, lowercased value) pairs
+        """
+        entries = NotificationBlacklist.objects.filter(user=user, is_active=True)
 
-            except NotificationPreference.DoesNotExist:
-                # If no specific preference, use default based on notification type
-                return notification_type in [
-                    'appointment_confirmation', 'appointment_reminder', 'emergency_alert'
-                ]
+        # Deactivate expired entries in one UPDATE before reading the rest
+        now = timezone.now()
+        entries.filter(expires_at__lt=now).update(is_active=False, updated_at=now)
 
-        except NotificationSettings.DoesNotExist:
-            # If no settings, create defaults and allow important notifications
-            NotificationPreferenceService.create_default_settings(user)
-            return notification_type in [
-                'appointment_confirmation', 'appointment_reminder', 'emergency_alert'
-            ]
+        return {
+            (blacklist_type, value.lower())
+            for blacklist_type, value in entries.values_list('blacklist_type', 'value')
+        }
 
     @staticmethod
-    def is_blacklisted(user, contact_info: str, blacklist_type: str) -> bool:
+    def is_blacklisted(
+        user,
+        contact_info: str,
+        blacklist_type: str,
+        blacklist: Optional[Set[Tuple[str, str]]] = None
+    ) -> bool:
         """
-        Check if a contact is blacklisted
+        Check if a contact is blacklisted. Pass the result of load_blacklist
+        to check many contacts for the same user without a query each.
         """
         try:
-            blacklist_entries = NotificationBlacklist.objects.filter(
-                user=user,
-                blacklist_type=blacklist_type,
-                is_active=True
-            )
+            if blacklist is None:
+                blacklist = NotificationPreferenceService.load_blacklist(user)
 
-            for entry in blacklist_entries:
-                # Check if entry has expired
-                if entry.expires_at and entry.expires_at < timezone.now():
-                    entry.is_active = False
-                    entry.save()
-                    continue
+            contact = contact_info.lower()
+            domain = contact.split('@', 1)[1] if '@' in contact else None
 
-                # Check for exact match or pattern match
-                if blacklist_type == 'domain' and '@' in contact_info:
-                    domain = contact_info.split('@')[1]
-                    if domain.lower() == entry.value.lower():
-                        return True
-                elif blacklist_type in ['email', 'phone']:
-                    if contact_info.lower() == entry.value.lower():
-                        return True
-                elif blacklist_type == 'keyword':
-                    if entry.value.lower() in contact_info.lower():
-                        return True
+            if blacklist_type == 'keyword':
+                return any(
+                    entry_type == 'keyword' and value in contact
+                    for entry_type, value in blacklist
+                )
+            if blacklist_type == 'domain':
+                return domain is not None and ('domain', domain) in blacklist
+            if blacklist_type in ['email', 'phone']:
+                if (blacklist_type, contact) in blacklist:
+                    return True
+                # An email address is also blocked when its domain is
+                return blacklist_type == 'email' and domain is not None and ('domain', domain) in blacklist
 
             return False
 
@@ -1611,85 +1651,171 @@ class NotificationPreferenceService:
         """
         Get user's preferred language for notifications
         """
-        try:
-            # Check for type-specific language preference
-            if notification_type:
-                preference = NotificationPreference.objects.filter(
-                    user=user,
-                    notification_type=notification_type,
-                    preferred_language__isnull=False
-                ).first()
-
-                if preference and preference.preferred_language:
-                    return preference.preferred_language.code
-
-            # Check global language setting
-            settings = NotificationSettings.objects.get(user=user)
-            if settings.default_language:
-                return settings.default_language.code
-
-            # Fallback to default system language
-            default_language = TemplateLanguage.objects.filter(is_default=True).first()
-            return default_language.code if default_language else 'en'
-
-        except (NotificationSettings.DoesNotExist, AttributeError):
+        user_id = getattr(user, 'pk', None)
+        if user_id is None:
             return 'en'
+        return _resolve_language(user_id, notification_type)
 
     @staticmethod
     def should_send_during_schedule(user, notification_type: str) -> bool:
         """
         Check if notification should be sent based on user's schedule preferences
         """
-        try:
-            current_time = timezone.now()
-            current_day = current_time.strftime('%A').lower()
-
-            # Check global quiet hours
-            settings = NotificationSettings.objects.get(user=user)
-            if settings.global_quiet_hours_enabled:
-                if (settings.global_quiet_hours_start and
-                    settings.global_quiet_hours_end and
-                    settings.global_quiet_hours_start <= current_time.time() <= settings.global_quiet_hours_end):
-                    return False
+        return PreferenceEvaluator(user).should_send_now(notification_type)
 
-            # Check weekend settings
-            if current_day in ['saturday', 'sunday'] and not settings.weekend_notifications_enabled:
-                return False
 
-            # Check custom schedules
-            active_schedules = NotificationSchedule.objects.filter(
-                user=user,
-                is_active=True,
-                notification_types__contains=[notification_type]
-            ).order_by('-priority')
+class PreferenceEvaluator:
+    """
+    Evaluates one user's notification preferences in memory. Settings,
+    preferences and the currently open schedules are each loaded once, on
+    first use, so a fan-out checking many types and channels for a
+    recipient costs at most three queries instead of one or two per check.
+    """
 
-            for schedule in active_schedules:
-                # Check date range
-                if schedule.start_date and current_time.date() < schedule.start_date:
-                    continue
-                if schedule.end_date and current_time.date() > schedule.end_date:
-                    continue
+    PRIORITY_LEVELS = {'low': 1, 'normal': 2, 'high': 3, 'urgent': 4}
+
+    # Allowed when the user has no settings or no preference for the type
+    DEFAULT_ALLOWED_TYPES = ('appointment_confirmation', 'appointment_reminder', 'emergency_alert')
+
+    CHANNEL_TOGGLES = {
+        'email': 'email_notifications_enabled',
+        'sms': 'sms_notifications_enabled',
+        'push': 'push_notifications_enabled',
+        'in_app': 'in_app_notifications_enabled',
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self._settings = None
+        self._settings_loaded = False
+        self._preferences = None
+        self._open_schedule_types = None
+
+    @property
+    def settings(self) -> Optional[NotificationSettings]:
+        if not self._settings_loaded:
+            self._settings = NotificationSettings.objects.filter(user=self.user).first()
+            self._settings_loaded = True
+        return self._settings
+
+    @property
+    def preferences(self) -> Dict[tuple, NotificationPreference]:
+        if self._preferences is None:
+            self._preferences = {
+                (preference.notification_type, preference.channel): preference
+                for preference in NotificationPreference.objects.filter(user=self.user)
+            }
+        return self._preferences
+
+    def open_schedule_types(self, current_time) -> List[List[str]]:
+        """
+        notification_types of the user's schedules that are open at current_time.
+        Date range, weekday and time window are all filtered in the database;
+        type membership is checked by the caller since JSONField containment
+        lookups are not available on SQLite.
+        """
+        if self._open_schedule_types is None:
+            today = current_time.date()
+            now = current_time.time()
+            self._open_schedule_types = list(
+                NotificationSchedule.objects.filter(
+                    models.Q(start_date__isnull=True) | models.Q(start_date__lte=today),
+                    models.Q(end_date__isnull=True) | models.Q(end_date__gte=today),
+                    user=self.user,
+                    is_active=True,
+                    start_time__lte=now,
+                    end_time__gte=now,
+                ).annotate(
+                    day_match=models.F('days_mask').bitand(1 << current_time.weekday())
+                ).filter(
+                    models.Q(days_mask=0) | models.Q(day_match__gt=0)
+                ).values_list('notification_types', flat=True)
+            )
+        return self._open_schedule_types
 
-                # Check day of week
-                if schedule.days_of_week and current_day not in schedule.days_of_week:
-                    continue
+    def check(self, notification_type: str, channel: str, priority: str = 'normal') -> bool:
+        """
+        Check if the user wants to receive a specific notification
+        """
+        settings = self.settings
+        if settings is None:
+            # If no settings, create defaults and allow important notifications
+            self._settings = NotificationPreferenceService.create_default_settings(self.user)
+            return notification_type in self.DEFAULT_ALLOWED_TYPES
 
-                # Check time range
-                if (schedule.start_time <= current_time.time() <= schedule.end_time):
-                    return True
+        # Master toggle
+        if not settings.notifications_enabled:
+            return False
+
+        # Channel-specific toggles
+        toggle = self.CHANNEL_TOGGLES.get(channel)
+        if toggle and not getattr(settings, toggle):
+            return False
+
+        # Check specific preference
+        preference = self.preferences.get((notification_type, channel))
+        if preference is None:
+            # If no specific preference, use default based on notification type
+            return notification_type in self.DEFAULT_ALLOWED_TYPES
 
-            # If no specific schedule found, allow during normal hours (8 AM - 10 PM)
-            return 8 <= current_time.hour <= 22
+        if not preference.is_enabled:
+            return False
+
+        # Check priority threshold
+        user_threshold = self.PRIORITY_LEVELS.get(preference.priority_threshold, 1)
+        if self.PRIORITY_LEVELS.get(priority, 2) < user_threshold:
+            return False
+
+        # Check quiet hours; urgent notifications are still allowed
+        if preference.quiet_hours_start and preference.quiet_hours_end:
+            current_time = timezone.now().time()
+            if preference.quiet_hours_start <= current_time <= preference.quiet_hours_end:
+                if priority != 'urgent':
+                    return False
+
+        return True
 
-        except NotificationSettings.DoesNotExist:
+    def should_send_now(self, notification_type: str) -> bool:
+        """
+        Check if a notification may be sent now under the user's schedules
+        """
+        settings = self.settings
+        if settings is None:
             return True  # Allow if no settings found
 
+        current_time = timezone.now()
+        current_day = current_time.strftime('%A').lower()
+
+        # Check global quiet hours
+        if settings.global_quiet_hours_enabled:
+            if (settings.global_quiet_hours_start and
+                settings.global_quiet_hours_end and
+                settings.global_quiet_hours_start <= current_time.time() <= settings.global_quiet_hours_end):
+                return False
+
+        # Check weekend settings
+        if current_day in ['saturday', 'sunday'] and not settings.weekend_notifications_enabled:
+            return False
+
+        # Any open schedule covering this notification type allows it
+        if any(
+            notification_type in (notification_types or [])
+            for notification_types in self.open_schedule_types(current_time)
+        ):
+            return True
+
+        # If no specific schedule found, allow during normal hours (8 AM - 10 PM)
+        return 8 <= current_time.hour <= 22
+
 
 class NotificationSchedulingService:
     """
     Service for managing notification scheduling and automation
     """
 
+    # Rows per multi-row INSERT; every row carries the job's template variables
+    QUEUE_INSERT_BATCH_SIZE = 500
+
     def __init__(self):
         self.preference_service = NotificationPreferenceService()
         self.email_service = EmailNotificationService()
@@ -1782,7 +1908,8 @@ class NotificationSchedulingService:
         created_by=None
     ) -> NotificationJob:
         """
-        Create a batch notification job for large recipient lists
+        Create a batch notification job for large recipient lists.
+        Recipients may be users or user primary keys.
         """
         job = NotificationJob.objects.create(
             name=name,
@@ -1810,8 +1937,10 @@ class NotificationSchedulingService:
         Queue a job for processing by creating queue items
         """
         recipients = self._get_job_recipients(job)
+        queue_items = []
 
-        for recipient in recipients:
+        # Stream recipients so large audiences are not loaded at once
+        for recipient in recipients.iterator(chunk_size=2000):
             # Check user preferences
             if not self.preference_service.check_user_preference(
                 user=recipient,
@@ -1825,8 +1954,7 @@ class NotificationSchedulingService:
             if not contact_info:
                 continue
 
-            # Create queue item
-            NotificationQueue.objects.create(
+            queue_items.append(NotificationQueue(
                 job=job,
                 recipient_user=recipient,
                 recipient_email=contact_info.get('email', ''),
@@ -1835,7 +1963,15 @@ class NotificationSchedulingService:
                 scheduled_at=job.scheduled_at,
                 priority=job.priority,
                 template_variables=job.template_variables
-            )
+            ))
+
+            # Insert queue items in multi-row batches instead of one row each
+            if len(queue_items) >= self.QUEUE_INSERT_BATCH_SIZE:
+                NotificationQueue.objects.bulk_create(queue_items)
+                queue_items = []
+
+        if queue_items:
+            NotificationQueue.objects.bulk_create(queue_items)
 
         # Update job status
         job.status = 'queued'
@@ -2352,6 +2488,8 @@ class CronJobService:
                 CronJobService._cleanup_old_notifications(job.task_parameters)
             elif job.task_function == 'generate_analytics_report':
                 CronJobService._generate_analytics_report(job.task_parameters)
+            elif job.task_function == 'rollup_notification_events':
+                CronJobService._rollup_notification_events(job.task_parameters)
             else:
                 logger.warning(f"Unknown task function: {job.task_function}")
 
@@ -2385,7 +2523,7 @@ class CronJobService:
         upcoming_appointments = Appointment.objects.filter(
             appointment_date=tomorrow,
             status='confirmed'
-        )
+        ).select_related('patient__user', 'doctor__user')
 
         scheduling_service = NotificationSchedulingService()
 
@@ -2419,7 +2557,7 @@ class CronJobService:
             daily_digest_enabled=True,
             notifications_enabled=True,
             email_notifications_enabled=True
-        )
+        ).select_related('user')
 
         scheduling_service = NotificationSchedulingService()
 
@@ -2486,12 +2624,33 @@ class CronJobService:
         # For now, just log that the task ran
         logger.info("Analytics report generation completed")
 
+    @staticmethod
+    def _rollup_notification_events(parameters: Dict[str, Any]):
+        """
+        Roll up the notification events of the last completed days
+        """
+        from datetime import timedelta
+
+        # Default to yesterday only; raise days to backfill after an outage
+        days = parameters.get('days', 1)
+        today = timezone.localdate()
+
+        for offset in range(days, 0, -1):
+            day = today - timedelta(days=offset)
+            rows = NotificationAnalyticsService.rollup_notification_events(day)
+            logger.info(f"Rolled up notification events for {day}: {rows} rows")
+
 
 class NotificationAnalyticsService:
     """
     Service for generating comprehensive notification analytics
     """
 
+    CLOSED_REPORT_CACHE_SECONDS = 86400
+    # Delivery, open, click and bounce statuses keep arriving for a while
+    # after a notification is created
+    REPORT_SETTLE_DAYS = 7
+
     @staticmethod
     def generate_analytics_report(
         start_date,
@@ -2502,74 +2661,68 @@ class NotificationAnalyticsService:
         """
         Generate comprehensive analytics report for a date range
         """
-        # Get all notifications in the date range
-        email_notifications = EmailNotification.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        )
-
-        sms_notifications = SMSNotification.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        )
-
-        push_notifications = PushNotification.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        )
-
-        # Calculate overall metrics
-        total_notifications = (
-            email_notifications.count() +
-            sms_notifications.count() +
-            push_notifications.count()
-        )
-
-        total_sent = (
-            email_notifications.filter(status__in=['sent', 'delivered']).count() +
-            sms_notifications.filter(status__in=['sent', 'delivered']).count() +
-            push_notifications.filter(status__in=['sent', 'delivered']).count()
-        )
-
-        total_delivered = (
-            email_notifications.filter(status='delivered').count() +
-            sms_notifications.filter(status='delivered').count() +
-            push_notifications.filter(status='delivered').count()
-        )
-
-        total_opened = email_notifications.filter(opened_at__isnull=False).count()
-        total_clicked = email_notifications.filter(clicked_at__isnull=False).count()
+        # A window that ended before the settle period cannot gain notifications
+        # or status changes, so its stored report is reused instead of being recomputed
+        from datetime import timedelta
 
-        total_failed = (
-            email_notifications.filter(status='failed').count() +
-            sms_notifications.filter(status='failed').count() +
-            push_notifications.filter(status='failed').count()
-        )
+        settled_before = timezone.localdate() - timedelta(days=NotificationAnalyticsService.REPORT_SETTLE_DAYS)
+        window_closed = end_date < settled_before
+        cache_id = f"notification_analytics:{report_type}:{start_date}:{end_date}"
+        if window_closed:
+            analytics_id = HospitalCacheManager.get_cache('system', 'report_data', cache_id)
+            if analytics_id:
+                analytics = NotificationAnalytics.objects.filter(pk=analytics_id).first()
+                if analytics:
+                    return analytics
+
+        # Compare created_at against datetime bounds rather than casting it with
+        # __date, so the created_at indexes can serve the range scan
+        period_start, period_end = NotificationAnalyticsService._period_bounds(start_date, end_date)
+        period = {'created_at__gte': period_start, 'created_at__lt': period_end}
 
-        total_bounced = email_notifications.filter(bounce_reason__isnull=False).count()
+        # Get all notifications in the date range
+        email_notifications = EmailNotification.objects.filter(**period)
+        sms_notifications = SMSNotification.objects.filter(**period)
+        push_notifications = PushNotification.objects.filter(**period)
 
         # Calculate channel-specific metrics
         email_metrics = NotificationAnalyticsService._calculate_email_metrics(email_notifications)
         sms_metrics = NotificationAnalyticsService._calculate_sms_metrics(sms_notifications)
         push_metrics = NotificationAnalyticsService._calculate_push_metrics(push_notifications)
 
-        # Calculate template performance
-        template_performance = NotificationAnalyticsService._calculate_template_performance(
-            email_notifications, sms_notifications, push_notifications
-        )
+        # Calculate overall metrics
+        channel_metrics = (email_metrics, sms_metrics, push_metrics)
+        total_notifications = sum(metrics['total'] for metrics in channel_metrics)
+        total_sent = sum(metrics['sent'] for metrics in channel_metrics)
+        total_delivered = sum(metrics['delivered'] for metrics in channel_metrics)
+        total_opened = email_metrics['opened']
+        total_clicked = email_metrics['clicked']
+        total_failed = sum(metrics['failed'] for metrics in channel_metrics)
+        total_bounced = email_metrics['bounced']
+
+        if total_notifications:
+            # Calculate template performance
+            template_performance = NotificationAnalyticsService._calculate_template_performance(
+                email_notifications, sms_notifications, push_notifications
+            )
 
-        # Calculate time-based distribution
-        hourly_distribution = NotificationAnalyticsService._calculate_hourly_distribution(
-            email_notifications, sms_notifications, push_notifications
-        )
+            # Calculate time-based distribution
+            hourly_distribution = NotificationAnalyticsService._calculate_hourly_distribution(
+                email_notifications, sms_notifications, push_notifications
+            )
 
-        daily_distribution = NotificationAnalyticsService._calculate_daily_distribution(
-            email_notifications, sms_notifications, push_notifications
-        )
+            daily_distribution = NotificationAnalyticsService._calculate_daily_distribution(
+                email_notifications, sms_notifications, push_notifications
+            )
+        else:
+            # Nothing in the period; skip the per-row passes
+            template_performance = {}
+            hourly_distribution = NotificationAnalyticsService._calculate_hourly_distribution([], [], [])
+            daily_distribution = NotificationAnalyticsService._calculate_daily_distribution([], [], [])
 
         # Calculate costs
         total_cost, cost_breakdown = NotificationAnalyticsService._calculate_costs(
-            email_notifications, sms_notifications, push_notifications
+            email_metrics, sms_metrics, push_metrics
         )
 
         # Create or update analytics record
@@ -2616,18 +2769,43 @@ class NotificationAnalyticsService:
             analytics.cost_breakdown = cost_breakdown
             analytics.save()
 
+        if window_closed:
+            HospitalCacheManager.set_cache(
+                'system', 'report_data', str(analytics.pk), cache_id,
+                timeout=NotificationAnalyticsService.CLOSED_REPORT_CACHE_SECONDS
+            )
+
         return analytics
 
+    @staticmethod
+    def _period_bounds(start_date, end_date):
+        """Aware datetimes covering start_date through the end of end_date"""
+        from datetime import datetime, time, timedelta
+
+        return (
+            timezone.make_aware(datetime.combine(start_date, time.min)),
+            timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+        )
+
     @staticmethod
     def _calculate_email_metrics(email_notifications):
         """Calculate email-specific metrics"""
-        total_emails = email_notifications.count()
-        sent_emails = email_notifications.filter(status__in=['sent', 'delivered']).count()
-        delivered_emails = email_notifications.filter(status='delivered').count()
-        opened_emails = email_notifications.filter(opened_at__isnull=False).count()
-        clicked_emails = email_notifications.filter(clicked_at__isnull=False).count()
-        bounced_emails = email_notifications.filter(bounce_reason__isnull=False).count()
-        failed_emails = email_notifications.filter(status='failed').count()
+        counts = email_notifications.aggregate(
+            total=models.Count('id'),
+            sent=models.Count('id', filter=models.Q(status__in=['sent', 'delivered'])),
+            delivered=models.Count('id', filter=models.Q(status='delivered')),
+            opened=models.Count('id', filter=models.Q(opened_at__isnull=False)),
+            clicked=models.Count('id', filter=models.Q(clicked_at__isnull=False)),
+            bounced=models.Count('id', filter=models.Q(bounce_reason__isnull=False)),
+            failed=models.Count('id', filter=models.Q(status='failed')),
+        )
+        total_emails = counts['total']
+        sent_emails = counts['sent']
+        delivered_emails = counts['delivered']
+        opened_emails = counts['opened']
+        clicked_emails = counts['clicked']
+        bounced_emails = counts['bounced']
+        failed_emails = counts['failed']
 
         return {
             'total': total_emails,
@@ -2646,16 +2824,18 @@ class NotificationAnalyticsService:
     @staticmethod
     def _calculate_sms_metrics(sms_notifications):
         """Calculate SMS-specific metrics"""
-        total_sms = sms_notifications.count()
-        sent_sms = sms_notifications.filter(status__in=['sent', 'delivered']).count()
-        delivered_sms = sms_notifications.filter(status='delivered').count()
-        failed_sms = sms_notifications.filter(status='failed').count()
-
-        # Calculate total cost
-        total_cost = sum(
-            notification.cost for notification in sms_notifications
-            if notification.cost
+        counts = sms_notifications.aggregate(
+            total=models.Count('id'),
+            sent=models.Count('id', filter=models.Q(status__in=['sent', 'delivered'])),
+            delivered=models.Count('id', filter=models.Q(status='delivered')),
+            failed=models.Count('id', filter=models.Q(status='failed')),
+            total_cost=models.Sum('cost'),
         )
+        total_sms = counts['total']
+        sent_sms = counts['sent']
+        delivered_sms = counts['delivered']
+        failed_sms = counts['failed']
+        total_cost = counts['total_cost'] or Decimal('0.00')
 
         return {
             'total': total_sms,
@@ -2671,12 +2851,20 @@ class NotificationAnalyticsService:
     @staticmethod
     def _calculate_push_metrics(push_notifications):
         """Calculate push notification metrics"""
-        total_push = push_notifications.count()
-        sent_push = push_notifications.filter(status__in=['sent', 'delivered']).count()
-        delivered_push = push_notifications.filter(status='delivered').count()
-        clicked_push = push_notifications.filter(clicked_at__isnull=False).count()
-        dismissed_push = push_notifications.filter(dismissed_at__isnull=False).count()
-        failed_push = push_notifications.filter(status='failed').count()
+        counts = push_notifications.aggregate(
+            total=models.Count('id'),
+            sent=models.Count('id', filter=models.Q(status__in=['sent', 'delivered'])),
+            delivered=models.Count('id', filter=models.Q(status='delivered')),
+            clicked=models.Count('id', filter=models.Q(clicked_at__isnull=False)),
+            dismissed=models.Count('id', filter=models.Q(dismissed_at__isnull=False)),
+            failed=models.Count('id', filter=models.Q(status='failed')),
+        )
+        total_push = counts['total']
+        sent_push = counts['sent']
+        delivered_push = counts['delivered']
+        clicked_push = counts['clicked']
+        dismissed_push = counts['dismissed']
+        failed_push = counts['failed']
 
         return {
             'total': total_push,
@@ -2791,23 +2979,19 @@ class NotificationAnalyticsService:
         return daily_distribution
 
     @staticmethod
-    def _calculate_costs(email_notifications, sms_notifications, push_notifications):
-        """Calculate total costs and breakdown by channel"""
-        from decimal import Decimal
-
+    def _calculate_costs(email_metrics, sms_metrics, push_metrics):
+        """Calculate total costs and breakdown by channel from the channel metrics"""
         # Email costs (usually free or very low cost)
         email_cost = Decimal('0.00')
-        email_count = email_notifications.count()
+        email_count = email_metrics['total']
 
         # SMS costs
-        sms_cost = sum(
-            notification.cost for notification in sms_notifications
-            if notification.cost
-        )
+        sms_cost = Decimal(str(sms_metrics['total_cost']))
+        sms_count = sms_metrics['total']
 
         # Push notification costs (usually free)
         push_cost = Decimal('0.00')
-        push_count = push_notifications.count()
+        push_count = push_metrics['total']
 
         total_cost = email_cost + sms_cost + push_cost
 
@@ -2819,8 +3003,8 @@ class NotificationAnalyticsService:
             },
             'sms': {
                 'total_cost': float(sms_cost),
-                'count': sms_notifications.count(),
-                'average_cost': float(sms_cost / sms_notifications.count()) if sms_notifications.count() > 0 else 0
+                'count': sms_count,
+                'average_cost': float(sms_cost / sms_count) if sms_count > 0 else 0
             },
             'push': {
                 'total_cost': float(push_cost),
@@ -2868,6 +3052,98 @@ class NotificationAnalyticsService:
 
         return event
 
+    @staticmethod
+    def bulk_track_notification_events(
+        events: List[Dict[str, Any]],
+        batch_size: int = 500
+    ) -> List[NotificationEvent]:
+        """
+        Track many notification events with batched inserts in one transaction.
+        Each item takes the same keyword arguments as track_notification_event.
+        """
+        instances = [
+            NotificationEvent(**{**event, 'event_data': event.get('event_data') or {}})
+            for event in events
+        ]
+
+        with transaction.atomic():
+            return NotificationEvent.objects.bulk_create(instances, batch_size=batch_size)
+
+    @staticmethod
+    def rollup_notification_events(day) -> int:
+        """
+        Recount one day's events into NotificationEventDaily; safe to rerun
+        """
+        day_start, day_end = NotificationAnalyticsService._period_bounds(day, day)
+
+        counts = NotificationEvent.objects.filter(
+            event_timestamp__gte=day_start,
+            event_timestamp__lt=day_end
+        ).values('notification_channel', 'notification_type', 'event_type').annotate(
+            count=models.Count('id')
+        )
+        rows = [NotificationEventDaily(day=day, **row) for row in counts]
+
+        with transaction.atomic():
+            NotificationEventDaily.objects.filter(day=day).delete()
+            NotificationEventDaily.objects.bulk_create(rows)
+
+        return len(rows)
+
+    @staticmethod
+    def get_event_counts(start_date, end_date) -> Dict[str, Dict[str, int]]:
+        """
+        Event counts by channel and event type for a date range. Past days
+        are summed from the daily rollup; today, and any past day the rollup
+        job has not covered, are counted from the raw events.
+        """
+        from datetime import timedelta
+
+        today = timezone.localdate()
+        event_counts = {}
+
+        def add(rows):
+            for row in rows:
+                channel_counts = event_counts.setdefault(row['notification_channel'], {})
+                channel_counts[row['event_type']] = channel_counts.get(row['event_type'], 0) + row['total']
+
+        raw_days = []
+        rolled_up_end = min(end_date, today - timedelta(days=1))
+        if start_date <= rolled_up_end:
+            rollup = NotificationEventDaily.objects.filter(day__gte=start_date, day__lte=rolled_up_end)
+            add(rollup.values('notification_channel', 'event_type').annotate(total=models.Sum('count')))
+
+            rolled_up_days = set(rollup.values_list('day', flat=True).distinct())
+            raw_days = [
+                day for day in (
+                    start_date + timedelta(days=offset)
+                    for offset in range((rolled_up_end - start_date).days + 1)
+                )
+                if day not in rolled_up_days
+            ]
+
+        if start_date <= today <= end_date:
+            raw_days.append(today)
+
+        if raw_days:
+            # One range per run of consecutive days keeps the filter short
+            # when the rollup has never run
+            raw_filter = models.Q()
+            run_start = previous = raw_days[0]
+            for day in raw_days[1:] + [None]:
+                if day is not None and day == previous + timedelta(days=1):
+                    previous = day
+                    continue
+                period_start, period_end = NotificationAnalyticsService._period_bounds(run_start, previous)
+                raw_filter |= models.Q(event_timestamp__gte=period_start, event_timestamp__lt=period_end)
+                run_start = previous = day
+
+            add(NotificationEvent.objects.filter(raw_filter).values(
+                'notification_channel', 'event_type'
+            ).annotate(total=models.Count('id')))
+
+        return event_counts
+
     @staticmethod
     def get_user_engagement_metrics(user, days=30):
         """
@@ -2883,10 +3159,17 @@ class NotificationAnalyticsService:
             event_timestamp__gte=start_date
         )
 
-        total_sent = events.filter(event_type='sent').count()
-        total_delivered = events.filter(event_type='delivered').count()
-        total_opened = events.filter(event_type='opened').count()
-        total_clicked = events.filter(event_type='clicked').count()
+        # One conditional aggregation instead of a COUNT query per event type
+        totals = events.aggregate(
+            sent=models.Count('id', filter=models.Q(event_type='sent')),
+            delivered=models.Count('id', filter=models.Q(event_type='delivered')),
+            opened=models.Count('id', filter=models.Q(event_type='opened')),
+            clicked=models.Count('id', filter=models.Q(event_type='clicked')),
+        )
+        total_sent = totals['sent']
+        total_delivered = totals['delivered']
+        total_opened = totals['opened']
+        total_clicked = totals['clicked']
 
         # Calculate engagement rates
         delivery_rate = (total_delivered / total_sent * 100) if total_sent > 0 else 0
@@ -2894,18 +3177,14 @@ class NotificationAnalyticsService:
         click_rate = (total_clicked / total_opened * 100) if total_opened > 0 else 0
 
         # Channel breakdown
-        channel_breakdown = {}
-        for event in events:
-            channel = event.notification_channel
-            if channel not in channel_breakdown:
-                channel_breakdown[channel] = {'sent': 0, 'opened': 0, 'clicked': 0}
-
-            if event.event_type == 'sent':
-                channel_breakdown[channel]['sent'] += 1
-            elif event.event_type == 'opened':
-                channel_breakdown[channel]['opened'] += 1
-            elif event.event_type == 'clicked':
-                channel_breakdown[channel]['clicked'] += 1
+        channel_breakdown = {
+            row.pop('notification_channel'): row
+            for row in events.values('notification_channel').annotate(
+                sent=models.Count('id', filter=models.Q(event_type='sent')),
+                opened=models.Count('id', filter=models.Q(event_type='opened')),
+                clicked=models.Count('id', filter=models.Q(event_type='clicked')),
+            )
+        }
 
         return {
             'user_id': user.id,
@@ -2927,6 +3206,8 @@ class NotificationCampaignService:
     Service for managing notification campaigns
     """
 
+    AUDIENCE_ESTIMATE_CACHE_SECONDS = 3600
+
     @staticmethod
     def create_campaign(
         name: str,
@@ -2967,13 +3248,14 @@ class NotificationCampaignService:
         User = get_user_model()
 
         queryset = User.objects.all()
+        filters = {}
 
         # Apply targeting filters
         if 'user_type' in target_audience:
-            queryset = queryset.filter(user_type=target_audience['user_type'])
+            filters['user_type'] = target_audience['user_type']
 
         if 'is_active' in target_audience:
-            queryset = queryset.filter(is_active=target_audience['is_active'])
+            filters['is_active'] = target_audience['is_active']
 
         if 'age_range' in target_audience:
             # This would require a birth_date field or age calculation
@@ -2983,7 +3265,18 @@ class NotificationCampaignService:
             # This would require location data
             pass
 
-        return queryset.count()
+        # An estimate can be an hour stale; campaigns with the same filters
+        # share one COUNT served by the (user_type, is_active) index
+        cache_id = 'campaign_audience:' + ':'.join(f'{key}={value}' for key, value in sorted(filters.items()))
+        estimate = HospitalCacheManager.get_cache('system', 'report_data', cache_id)
+        if estimate is None:
+            estimate = queryset.filter(**filters).count()
+            HospitalCacheManager.set_cache(
+                'system', 'report_data', estimate, cache_id,
+                timeout=NotificationCampaignService.AUDIENCE_ESTIMATE_CACHE_SECONDS
+            )
+
+        return estimate
 
     @staticmethod
     def launch_campaign(campaign_id: str) -> bool:
@@ -3068,13 +3361,33 @@ class NotificationCampaignService:
         except NotificationCampaign.DoesNotExist:
             return False
 
+    @staticmethod
+    def _rate_expression(numerator: str, denominator: str):
+        """Percentage of two fields; NULLIF makes a zero denominator NULL, reported as 0"""
+        return Coalesce(
+            ExpressionWrapper(
+                Cast(numerator, models.FloatField()) * 100.0 / NullIf(models.F(denominator), 0),
+                output_field=models.FloatField()
+            ),
+            0.0,
+            output_field=models.FloatField()
+        )
+
     @staticmethod
     def get_campaign_analytics(campaign_id: str) -> Dict[str, Any]:
         """
         Get analytics for a specific campaign
         """
+        rate = NotificationCampaignService._rate_expression
+
         try:
-            campaign = NotificationCampaign.objects.get(campaign_id=campaign_id)
+            # Rates are computed by the database in the same query as the row
+            campaign = NotificationCampaign.objects.annotate(
+                delivery_pct=rate('total_delivered', 'total_sent'),
+                open_pct=rate('total_opened', 'total_delivered'),
+                click_pct=rate('total_clicked', 'total_opened'),
+                conversion_pct=rate('total_conversions', 'total_clicked'),
+            ).get(campaign_id=campaign_id)
 
             # Calculate performance metrics
             analytics = {
@@ -3088,10 +3401,10 @@ class NotificationCampaignService:
                 'total_opened': campaign.total_opened,
                 'total_clicked': campaign.total_clicked,
                 'total_conversions': campaign.total_conversions,
-                'delivery_rate': campaign.delivery_rate,
-                'open_rate': campaign.open_rate,
-                'click_rate': campaign.click_rate,
-                'conversion_rate': campaign.conversion_rate,
+                'delivery_rate': campaign.delivery_pct,
+                'open_rate': campaign.open_pct,
+                'click_rate': campaign.click_pct,
+                'conversion_rate': campaign.conversion_pct,
                 'budget': float(campaign.budget) if campaign.budget else None,
                 'actual_cost': float(campaign.actual_cost),
                 'roi': campaign.roi,
@@ -3116,20 +3429,19 @@ class NotificationCampaignService:
         cost=0
     ):
         """
-        Update campaign performance metrics
-        """
-        try:
-            campaign = NotificationCampaign.objects.get(campaign_id=campaign_id)
-
-            campaign.total_sent += sent
-            campaign.total_delivered += delivered
-            campaign.total_opened += opened
-            campaign.total_clicked += clicked
-            campaign.total_conversions += conversions
-            from decimal import Decimal
-            campaign.actual_cost += Decimal(str(cost))
-
-            campaign.save()
+        Add deltas to campaign performance metrics
+        """
+        # Increment in the database so concurrent workers reporting metrics
+        # cannot overwrite each other's counts
+        updated = NotificationCampaign.objects.filter(campaign_id=campaign_id).update(
+            total_sent=models.F('total_sent') + sent,
+            total_delivered=models.F('total_delivered') + delivered,
+            total_opened=models.F('total_opened') + opened,
+            total_clicked=models.F('total_clicked') + clicked,
+            total_conversions=models.F('total_conversions') + conversions,
+            actual_cost=models.F('actual_cost') + Decimal(str(cost)),
+            updated_at=timezone.now()
+        )
 
-        except NotificationCampaign.DoesNotExist:
+        if not updated:
             logger.error(f"Campaign {campaign_id} not found for metrics update")
@@ -0,0 +1,23 @@
+"""
+Drop cached notification languages when the data they resolve from changes
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .models import NotificationPreference, NotificationSettings
+from .services import invalidate_user_language
+
+# Per-user models read by _resolve_language; TemplateLanguage edits are left
+# to the cache timeout
+LANGUAGE_SOURCES = (NotificationPreference, NotificationSettings)
+
+
+def invalidate_resolved_languages(sender, instance, **kwargs):
+    """
+    Start a new language cache version for the affected user
+    """
+    invalidate_user_language(instance.user_id)
+
+
+for model in LANGUAGE_SOURCES:
+    post_save.connect(invalidate_resolved_languages, sender=model, dispatch_uid=f'invalidate_resolved_languages_save_{model.__name__}')
+    post_delete.connect(invalidate_resolved_languages, sender=model, dispatch_uid=f'invalidate_resolved_languages_delete_{model.__name__}')
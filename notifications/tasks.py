@@ -0,0 +1,38 @@
+import logging
+from typing import Any, Dict, Optional
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+
+from .services import EmailNotificationService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_email_notification_task(
+    template_type: str,
+    recipient_email: str,
+    variables: Dict[str, Any],
+    recipient_user_id: Optional[int] = None,
+    priority: str = 'normal'
+) -> str:
+    """
+    Render, store and deliver an email notification on a worker.
+
+    Arguments are JSON-serializable so independent notifications can be
+    fanned out with a celery group; returns the notification primary key.
+    """
+    recipient_user = None
+    if recipient_user_id is not None:
+        recipient_user = get_user_model().objects.filter(pk=recipient_user_id).first()
+
+    notification = EmailNotificationService().send_notification(
+        template_type=template_type,
+        recipient_email=recipient_email,
+        variables=variables,
+        recipient_user=recipient_user,
+        priority=priority
+    )
+    logger.info(f"Email notification {notification.notification_id} processed with status {notification.status}")
+    return str(notification.id)
@@ -1,3 +1,179 @@
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+
+from .models import NotificationSchedule, NotificationSettings, TemplateLanguage
+from .services import NotificationAnalyticsService, NotificationPreferenceService
+
+WEEKDAYS_MASK = 0b0011111
+WEEKEND_MASK = 0b1100000
+
+
+class NotificationScheduleDaysMaskTest(TestCase):
+    """days_mask must follow days_of_week on every write path"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pat1', email='pat1@example.com', password='SecurePass123!', user_type='patient'
+        )
+
+    def _schedule(self, days, save=True):
+        schedule = NotificationSchedule(
+            user=self.user, name='Business hours', schedule_type='weekly',
+            start_time=time(9), end_time=time(17), days_of_week=days
+        )
+        if save:
+            schedule.save()
+        return schedule
+
+    def _stored_mask(self, schedule):
+        return NotificationSchedule.objects.values_list('days_mask', flat=True).get(pk=schedule.pk)
+
+    def test_save(self):
+        schedule = self._schedule(['monday', 'tuesday', 'wednesday', 'thursday', 'friday'])
+        self.assertEqual(self._stored_mask(schedule), WEEKDAYS_MASK)
+
+    def test_save_with_update_fields(self):
+        schedule = self._schedule(['monday', 'tuesday', 'wednesday', 'thursday', 'friday'])
+        schedule.days_of_week = ['saturday', 'sunday']
+        schedule.save(update_fields=['days_of_week'])
+        self.assertEqual(self._stored_mask(schedule), WEEKEND_MASK)
+
+    def test_queryset_update(self):
+        schedule = self._schedule(['monday'])
+        NotificationSchedule.objects.filter(pk=schedule.pk).update(days_of_week=['saturday', 'sunday'])
+        self.assertEqual(self._stored_mask(schedule), WEEKEND_MASK)
+
+    def test_bulk_create(self):
+        schedule, = NotificationSchedule.objects.bulk_create([self._schedule(['saturday', 'sunday'], save=False)])
+        self.assertEqual(self._stored_mask(schedule), WEEKEND_MASK)
+
+    def test_bulk_update(self):
+        schedule = self._schedule(['monday'])
+        schedule.days_of_week = ['saturday', 'sunday']
+        NotificationSchedule.objects.bulk_update([schedule], ['days_of_week'])
+        self.assertEqual(self._stored_mask(schedule), WEEKEND_MASK)
+
+
+
+class NotificationLanguageCacheTest(TestCase):
+    """Resolved languages are cached per user and follow the user's settings"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pat1', email='pat1@example.com', password='SecurePass123!', user_type='patient'
+        )
+        self.spanish = TemplateLanguage.objects.create(code='es', name='Spanish', native_name='Español')
+        self.settings = NotificationPreferenceService.create_default_settings(self.user)
+
+    def test_language_is_cached(self):
+        self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'en')
+        with patch('notifications.services._lookup_language') as lookup:
+            self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'en')
+        lookup.assert_not_called()
+
+    def test_saving_settings_invalidates_cached_language(self):
+        self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'en')
+
+        self.settings.default_language = self.spanish
+        self.settings.save()
+
+        self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'es')
+
+    def test_bulk_writes_skip_invalidation_until_timeout(self):
+        self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'en')
+
+        NotificationSettings.objects.filter(pk=self.settings.pk).update(default_language=self.spanish)
+        self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'en')
+
+        # What the entry timeout does in production
+        cache.clear()
+        self.assertEqual(NotificationPreferenceService.get_user_language(self.user), 'es')
+
+class NotificationAnalyticsServiceTest(TestCase):
+    """Test cases for Notification Analytics Service"""
+
+    def setUp(self):
+        self.service = NotificationAnalyticsService()
+        self.user = User.objects.create_user(
+            username='user1', email='user1@example.com', password='SecurePass123!', user_type='patient'
+        )
+
+    def _report_twice(self, start_date, end_date):
+        first = self.service.generate_analytics_report(
+            start_date=start_date,
+            end_date=end_date,
+            report_type='weekly'
+        )
+
+        with patch.object(
+            NotificationAnalyticsService, '_calculate_email_metrics',
+            wraps=NotificationAnalyticsService._calculate_email_metrics
+        ) as calculate:
+            second = self.service.generate_analytics_report(
+                start_date=start_date,
+                end_date=end_date,
+                report_type='weekly'
+            )
+
+        return first, second, calculate
+
+    def test_settled_window_report_is_reused(self):
+        """Test reports over windows past the settle period are not recomputed"""
+        end_date = date.today() - timedelta(days=NotificationAnalyticsService.REPORT_SETTLE_DAYS + 1)
+        start_date = end_date - timedelta(days=6)
+
+        first, second, calculate = self._report_twice(start_date, end_date)
+
+        calculate.assert_not_called()
+        self.assertEqual(second.pk, first.pk)
+
+    def test_recent_window_report_is_recomputed(self):
+        """Test reports over recently ended windows pick up late status changes"""
+        end_date = date.today() - timedelta(days=1)
+        start_date = end_date - timedelta(days=6)
+
+        _, _, calculate = self._report_twice(start_date, end_date)
+
+        calculate.assert_called_once()
+
+    def _track_past_events(self, days_ago, event_types):
+        for event_type in event_types:
+            event = self.service.track_notification_event(
+                event_type=event_type,
+                notification_type='test',
+                notification_channel='email',
+                notification_id='12345678-1234-1234-1234-123456789012',
+                recipient_user=self.user
+            )
+            event.event_timestamp -= timedelta(days=days_ago)
+            event.save()
+
+    def test_rollup_notification_events(self):
+        """Test daily rollup counts feed event counts for past days"""
+        yesterday = date.today() - timedelta(days=1)
+        self._track_past_events(1, ('sent', 'sent', 'opened'))
+
+        self.assertEqual(self.service.rollup_notification_events(yesterday), 2)
+        # Rerunning recounts instead of adding to the existing rows
+        self.assertEqual(self.service.rollup_notification_events(yesterday), 2)
+
+        counts = self.service.get_event_counts(yesterday, yesterday)
+        self.assertEqual(counts, {'email': {'sent': 2, 'opened': 1}})
+
+    def test_event_counts_without_rollup(self):
+        """Test past days the rollup has not covered are counted from raw events"""
+        today = date.today()
+        self._track_past_events(3, ('sent', 'opened'))
+        self._track_past_events(1, ('sent',))
+        self._track_past_events(0, ('sent',))
+
+        # Only the day three days ago has been rolled up
+        self.service.rollup_notification_events(today - timedelta(days=3))
+
+        counts = self.service.get_event_counts(today - timedelta(days=6), today)
+        self.assertEqual(counts, {'email': {'sent': 3, 'opened': 1}})
@@ -763,7 +763,10 @@ class NotificationPreferenceViewSet(viewsets.ModelViewSet):
         """
         Return preferences for the current user
         """
-        return NotificationPreference.objects.filter(user=self.request.user)
+        # language_name reads preferred_language for every row
+        return NotificationPreference.objects.filter(
+            user=self.request.user
+        ).select_related('preferred_language')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -892,13 +895,17 @@ class NotificationSettingsViewSet(viewsets.ModelViewSet):
         """
         Return settings for the current user
         """
-        return NotificationSettings.objects.filter(user=self.request.user)
+        return NotificationSettings.objects.filter(
+            user=self.request.user
+        ).select_related('default_language')
 
     def get_object(self):
         """
         Get or create notification settings for the current user
         """
-        settings, created = NotificationSettings.objects.get_or_create(
+        settings, created = NotificationSettings.objects.select_related(
+            'default_language'
+        ).get_or_create(
             user=self.request.user,
             defaults={}
         )
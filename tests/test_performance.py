@@ -7,9 +7,11 @@ import threading
 import statistics
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import gzip
 import json
 
-from django.test import TestCase, TransactionTestCase
+from django.conf import settings
+from django.test import RequestFactory, TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.db import transaction, connection
@@ -773,3 +775,53 @@ class EndToEndPerformanceTest(PerformanceTestBase):
         self.assertLess(workflow_times.get('authentication', 1000), 500, "Authentication should be < 500ms")
 
         return workflow_times
+
+
+class GzipRequestMiddlewareTest(TestCase):
+    """
+    Test decompression of gzip-encoded request bodies
+    """
+    
+    def setUp(self):
+        from hospital_backend.performance_middleware import GzipRequestMiddleware
+        self.middleware = GzipRequestMiddleware(lambda request: None)
+        self.factory = RequestFactory()
+    
+    def _gzip_request(self, body):
+        return self.factory.post(
+            '/api/test/', data=gzip.compress(body), content_type='application/json',
+            HTTP_CONTENT_ENCODING='gzip'
+        )
+    
+    def test_body_is_decompressed(self):
+        payload = json.dumps({'notes': 'x' * 1000}).encode()
+        request = self._gzip_request(payload)
+        
+        self.assertIsNone(self.middleware.process_request(request))
+        self.assertEqual(request.body, payload)
+        self.assertEqual(request.META['CONTENT_LENGTH'], str(len(payload)))
+        self.assertNotIn('HTTP_CONTENT_ENCODING', request.META)
+    
+    def test_invalid_gzip_is_rejected(self):
+        request = self.factory.post(
+            '/api/test/', data=b'not gzip', content_type='application/json',
+            HTTP_CONTENT_ENCODING='gzip'
+        )
+        response = self.middleware.process_request(request)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_oversized_body_is_rejected(self):
+        self.middleware.max_body_size = 100
+        response = self.middleware.process_request(self._gzip_request(b'0' * 1000))
+        self.assertEqual(response.status_code, 413)
+    
+    def test_body_over_upload_limit_is_rejected(self):
+        # A gzip body may not inflate past what an uncompressed body could be
+        self.assertEqual(self.middleware.max_body_size, settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+        
+        request = self._gzip_request(b'0' * (settings.DATA_UPLOAD_MAX_MEMORY_SIZE + 1))
+        response = self.middleware.process_request(request)
+        self.assertEqual(response.status_code, 413)
+        
+        request = self._gzip_request(b'0' * settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+        self.assertIsNone(self.middleware.process_request(request))
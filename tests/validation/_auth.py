@@ -0,0 +1,116 @@
+"""
+Shared logins for the HTTP validation scripts.
+
+Set HMS_TEST_TOKEN_CACHE=1 to persist access tokens between runs so
+every script does not pay for a password hash check and JWT signing.
+Tokens are cached per server and account. Leave it unset on CI to always
+log in fresh.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import orjson
+import requests
+
+from _payloads import ADMIN_CREDENTIALS, JSON_HEADERS, LOGIN_BODY
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.environ.get('HMS_BASE_URL', 'http://localhost:8000/api')
+
+TOKEN_CACHE_PATH = Path(__file__).resolve().parents[2] / '.pytest_token_cache.json'
+
+# Treat tokens this close to expiry as already expired
+EXPIRY_MARGIN_SECONDS = 30
+
+
+def _token_cache_enabled():
+    return os.environ.get('HMS_TEST_TOKEN_CACHE') == '1'
+
+
+def _token_cache_key(email):
+    """Cache entry for one account on the configured server"""
+    return hashlib.sha1(f'{BASE_URL}|{email}'.encode()).hexdigest()
+
+
+def _token_expiry(token):
+    """Read the exp claim from a JWT without verifying its signature"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return 0
+
+
+def _read_token_cache():
+    try:
+        cache = json.loads(TOKEN_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _read_cached_token(email):
+    cached = _read_token_cache().get(_token_cache_key(email))
+    if not isinstance(cached, dict):
+        return None
+    if cached.get('exp', 0) - EXPIRY_MARGIN_SECONDS <= time.time():
+        return None
+    return cached.get('access')
+
+
+def _write_cached_token(email, token):
+    cache = _read_token_cache()
+    cache[_token_cache_key(email)] = {'access': token, 'exp': _token_expiry(token)}
+
+    # Write then rename so parallel scripts never read a half-written cache
+    tmp_path = TOKEN_CACHE_PATH.with_name(f'{TOKEN_CACHE_PATH.name}.{os.getpid()}')
+    tmp_path.write_text(json.dumps(cache))
+    os.replace(tmp_path, TOKEN_CACHE_PATH)
+
+
+@lru_cache(maxsize=None)
+def _login_body(credential_items):
+    """Serialized login body, built once per set of credentials"""
+    return orjson.dumps(dict(credential_items))
+
+
+def _login(email, body, session=None):
+    if _token_cache_enabled():
+        token = _read_cached_token(email)
+        if token:
+            logger.info("Login Status: cached")
+            return token
+
+    response = (session or requests).post(
+        f'{BASE_URL}/accounts/auth/login/', data=body, headers=JSON_HEADERS
+    )
+    if response.status_code != 200:
+        logger.warning("Login Status: %s", response.status_code)
+        return None
+    logger.info("Login Status: %s", response.status_code)
+
+    token = response.json()['access']
+    if _token_cache_enabled():
+        _write_cached_token(email, token)
+    return token
+
+
+def get_token(credentials, session=None):
+    """
+    Return an access token for the given email/password, reusing the cached
+    one while it is valid. Returns None if the login request fails.
+    """
+    return _login(credentials['email'], _login_body(tuple(credentials.items())), session)
+
+
+def get_admin_token(session=None):
+    """Admin access token; see get_token()"""
+    return _login(ADMIN_CREDENTIALS['email'], LOGIN_BODY, session)
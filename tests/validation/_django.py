@@ -0,0 +1,35 @@
+"""
+Django bootstrap and shared lookups for the ORM validation scripts.
+
+Under pytest, pytest-django (configured in pytest.ini) sets Django up once
+per session before collection, so setup() is a no-op there. Run directly,
+a script calls setup() before importing any models.
+"""
+import os
+from types import SimpleNamespace
+
+import django
+
+
+def setup():
+    """Configure Django unless it is already set up in this process"""
+    from django.apps import apps
+
+    if apps.ready:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
+    django.setup()
+
+
+def load_actors():
+    """SimpleNamespace(patient, user, admin) from the seeded database"""
+    from accounts.models import User
+    from patients.models import Patient
+
+    # The scripts only read names and email off these users
+    patient = Patient.objects.select_related('user').first()
+    user = patient.user if patient else (
+        User.objects.filter(user_type='patient').only('id', 'email', 'first_name', 'last_name').first()
+    )
+    admin = User.objects.filter(user_type='admin').only('id', 'first_name', 'last_name').first()
+    return SimpleNamespace(patient=patient, user=user, admin=admin)
@@ -0,0 +1,228 @@
+"""
+Shared requests.Session factory for the HTTP validation scripts.
+
+Sessions retry throttled or briefly unavailable responses with backoff so
+bursts from the thread pools and pytest-xdist workers do not turn into
+false failures. Set HMS_RATE_PER_MIN to also pace outgoing requests.
+
+Set HMS_TEST_HTTP_CACHE=1 to have new_session() memoise GET responses for
+HTTP_CACHE_SECONDS in a local sqlite file (requires requests-cache from
+requirements-dev.txt). Meant for the debug loop of re-running one script;
+leave it unset on CI so every read hits the server.
+
+gzip_post() compresses request bodies; the text documents and record notes
+these scripts send shrink several times over.
+
+conditional_get() revalidates slow read-only endpoints with If-None-Match,
+keeping the last ETag and body in a shelf at the repo root so repeat runs
+get a bodiless 304 instead of having the server recompute the payload.
+
+This stays on HTTP/1.1 keep-alive pooling: runserver and the gunicorn image
+only speak plain HTTP/1.1, and HTTP/2 clients need TLS (ALPN) to negotiate
+h2, so a multiplexing client would fall back to one connection per request
+in flight anyway. Reused pooled connections already avoid the handshakes.
+"""
+import dbm
+import gzip
+import json
+import os
+import shelve
+import threading
+import time
+from pathlib import Path
+
+import requests
+from urllib3.util import Retry
+
+
+class IdempotentRetry(Retry):
+    """
+    Retry idempotent methods on any status in status_forcelist, but POST
+    only when the server refused it outright: a 429/503 carrying
+    Retry-After. A POST that timed out at a proxy (502/504) may already
+    be committed, and resending it would create a duplicate record.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == 'POST':
+            return bool(
+                self.total
+                and has_retry_after
+                and status_code in (429, 503)
+            )
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+RETRY = IdempotentRetry(
+    total=5,
+    backoff_factor=0.1,
+    status_forcelist=(429, 502, 503, 504),
+    # Connection and read errors are only retried for urllib3's default
+    # idempotent methods, so POST is never resent after a dropped response
+    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+    # Hand the last response back so callers keep their status-code checks
+    raise_on_status=False,
+)
+
+HTTP_CACHE_PATH = Path(__file__).resolve().parents[2] / '.pytest_http_cache.sqlite'
+
+# Short enough that reads issued after the uploads in a later run are fresh
+HTTP_CACHE_SECONDS = 30
+
+# test_medical_history.py leaves the ID of the record it created here, per
+# server, for test_medical_documents.py to attach its uploads to
+LAST_RECORD_PATH = Path(__file__).resolve().parents[2] / '.pytest_last_medical_record_ids.json'
+
+ETAG_CACHE_PATH = Path(__file__).resolve().parents[2] / '.pytest_etag_cache'
+
+# shelve is not thread safe; serialise access from the read fan-outs
+_etag_cache_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Spread calls evenly at a fixed number per minute"""
+
+    def __init__(self, rate_per_minute):
+        self._interval = 60.0 / rate_per_minute
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimited(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that waits for a token bucket slot before each request"""
+
+    def __init__(self, bucket, **kwargs):
+        self._bucket = bucket
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self._bucket.consume()
+        return super().send(request, **kwargs)
+
+
+def _read_last_records():
+    try:
+        records = json.loads(LAST_RECORD_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+    return records if isinstance(records, dict) else {}
+
+
+def read_last_record_id(base_url):
+    """ID of the medical record last created on this server, or None"""
+    return _read_last_records().get(base_url)
+
+
+def write_last_record_id(base_url, record_id):
+    records = _read_last_records()
+    records[base_url] = record_id
+
+    # Write then rename so a concurrent reader never sees a half-written file
+    tmp_path = LAST_RECORD_PATH.with_name(f'{LAST_RECORD_PATH.name}.{os.getpid()}')
+    tmp_path.write_text(json.dumps(records))
+    os.replace(tmp_path, LAST_RECORD_PATH)
+
+
+def _mount_adapter(session):
+    """Mount the pooled, retrying (and optionally rate limited) adapter on session"""
+    adapter_kwargs = {'pool_connections': 4, 'pool_maxsize': 16, 'max_retries': RETRY}
+
+    rate_per_minute = int(os.environ.get('HMS_RATE_PER_MIN', '0'))
+    if rate_per_minute > 0:
+        # Each pytest-xdist worker gets its own bucket
+        adapter = RateLimited(TokenBucket(rate_per_minute), **adapter_kwargs)
+    else:
+        adapter = requests.adapters.HTTPAdapter(**adapter_kwargs)
+
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def new_session():
+    """build_session(), or a requests-cache CachedSession with the same adapter when HMS_TEST_HTTP_CACHE=1"""
+    if os.environ.get('HMS_TEST_HTTP_CACHE') != '1':
+        return build_session()
+
+    import requests_cache
+
+    return _mount_adapter(requests_cache.CachedSession(
+        str(HTTP_CACHE_PATH),
+        backend='sqlite',
+        expire_after=HTTP_CACHE_SECONDS,
+        allowable_methods=('GET',),
+    ))
+
+
+def build_session():
+    """Pooled Session with retries, rate limited when HMS_RATE_PER_MIN is set"""
+    return _mount_adapter(requests.Session())
+
+
+def do_request(session, spec):
+    """
+    Issue one (name, method, url, params) read check on a shared session and
+    return (name, response), for dict(executor.map(partial(do_request, session), specs))
+    """
+    name, method, url, params = spec
+    return name, session.request(method, url, params=params)
+
+
+def _etag_cache_key(url, params):
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+def conditional_get(session, url, params=None):
+    """
+    GET that sends the cached ETag as If-None-Match. A 304 is returned to the
+    caller as a 200 carrying the cached body, so status checks stay unchanged.
+    """
+    key = _etag_cache_key(url, params)
+    try:
+        with _etag_cache_lock, shelve.open(str(ETAG_CACHE_PATH)) as cache:
+            cached = cache.get(key)
+    except dbm.error:
+        # Another process holds the shelf; fall back to a plain GET
+        return session.get(url, params=params)
+
+    headers = {'If-None-Match': cached['etag']} if cached else {}
+    response = session.get(url, params=params, headers=headers)
+
+    if response.status_code == 304 and cached:
+        response.status_code = 200
+        response._content = cached['body']
+        response.headers['Content-Type'] = cached['content_type']
+        return response
+
+    etag = response.headers.get('ETag')
+    if response.status_code == 200 and etag:
+        try:
+            with _etag_cache_lock, shelve.open(str(ETAG_CACHE_PATH)) as cache:
+                cache[key] = {
+                    'etag': etag,
+                    'body': response.content,
+                    'content_type': response.headers.get('Content-Type', ''),
+                }
+        except dbm.error:
+            pass
+    return response
+
+
+def gzip_post(session, url, **kwargs):
+    """
+    POST with the encoded body (JSON or multipart) gzip-compressed. The server's
+    GzipRequestMiddleware inflates it before the parsers run.
+    """
+    request = session.prepare_request(requests.Request('POST', url, **kwargs))
+    request.body = gzip.compress(request.body, compresslevel=6)
+    request.headers['Content-Encoding'] = 'gzip'
+    request.headers['Content-Length'] = str(len(request.body))
+    return session.send(request)
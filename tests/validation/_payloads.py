@@ -0,0 +1,25 @@
+"""
+Request bodies shared by the HTTP validation scripts, serialized once at import.
+"""
+import orjson
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+EMPTY_JSON_BODY = b'{}'
+
+ADMIN_CREDENTIALS = {
+    'email': 'admin@hospital.com',
+    'password': 'admin123'
+}
+
+LOGIN_BODY = orjson.dumps(ADMIN_CREDENTIALS)
+
+DOCTOR_EMAIL_LOGIN_BODY = orjson.dumps({
+    'email': 'doctor.test@hospital.com',
+    'password': 'securepass123'
+})
+
+DOCTOR_USERNAME_LOGIN_BODY = orjson.dumps({
+    'username': 'doctor.test@hospital.com',
+    'password': 'securepass123'
+})
@@ -0,0 +1,181 @@
+"""
+Shared fixtures for the HTTP validation scripts.
+
+Run them in parallel against a live server with:
+    pytest -n auto tests/validation/test_invoice_generation.py tests/validation/test_medical_alerts.py tests/validation/test_login.py
+
+Step-by-step progress is logged at INFO; add -o log_cli=true --log-cli-level=INFO to see it live.
+
+The ORM scripts (notification analytics, preferences and scheduling) run against the
+configured database, each inside a transaction that is rolled back afterwards:
+    pytest -n auto --dist=loadfile tests/validation/test_notification_*.py
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+import requests
+
+from _auth import BASE_URL, TOKEN_CACHE_PATH, get_admin_token
+from _django import load_actors
+from _http import build_session
+
+
+@pytest.fixture(scope='session')
+def auth_session():
+    """Pooled requests.Session carrying an admin bearer token"""
+    session = build_session()
+
+    try:
+        token = get_admin_token(session)
+    except requests.ConnectionError:
+        pytest.skip("API server is not reachable")
+
+    if not token:
+        pytest.skip("Admin login failed")
+
+    session.headers.update({'Authorization': f'Bearer {token}'})
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope='session')
+def django_db_setup():
+    """
+    Use the configured, seeded database instead of creating a test database.
+    SQLite takes one writer at a time, so each pytest-xdist worker gets its own copy.
+    """
+    from django.db import connections
+
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    db = connections['default'].settings_dict
+    if not worker or db['ENGINE'] != 'django.db.backends.sqlite3':
+        yield
+        return
+
+    seeded_name = db['NAME']
+    worker_db = Path(f'{seeded_name}.{worker}')
+    shutil.copyfile(seeded_name, worker_db)
+    connections['default'].close()
+    db['NAME'] = str(worker_db)
+    try:
+        yield
+    finally:
+        connections['default'].close()
+        db['NAME'] = seeded_name
+        worker_db.unlink(missing_ok=True)
+
+
+@pytest.fixture(scope='module')
+def actors(django_db_setup, django_db_blocker):
+    """SimpleNamespace(patient, user, admin), fetched once per script"""
+    with django_db_blocker.unblock():
+        return load_actors()
+
+
+# Seeded service IDs keyed by BASE_URL, reused across runs when HMS_TEST_SEED_CACHE=1
+SEED_CACHE_PATH = TOKEN_CACHE_PATH.with_name('.pytest_seed_cache.json')
+
+SERVICE_CATEGORY = {
+    'name': 'Consultation Services',
+    'description': 'Medical consultation and examination services',
+    'is_active': True
+}
+
+SERVICES = [
+    {
+        'name': 'General Consultation',
+        'code': 'CONS001',
+        'description': 'General medical consultation and examination',
+        'base_price': '150.00',
+        'insurance_price': '120.00',
+        'duration_minutes': 30,
+        'requires_authorization': False,
+        'is_active': True
+    },
+    {
+        'name': 'Specialist Consultation',
+        'code': 'CONS002',
+        'description': 'Specialist medical consultation',
+        'base_price': '250.00',
+        'insurance_price': '200.00',
+        'duration_minutes': 45,
+        'requires_authorization': True,
+        'is_active': True
+    },
+    {
+        'name': 'Follow-up Visit',
+        'code': 'CONS003',
+        'description': 'Follow-up consultation visit',
+        'base_price': '100.00',
+        'insurance_price': '80.00',
+        'duration_minutes': 20,
+        'requires_authorization': False,
+        'is_active': True
+    }
+]
+
+
+def _results(response):
+    data = response.json()
+    return data if isinstance(data, list) else data.get('results', [])
+
+
+def _read_seed_cache():
+    try:
+        return json.loads(SEED_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _seed_billing_services(session):
+    """Get or create the consultation category and its services"""
+    response = session.post(f'{BASE_URL}/billing/service-categories/', json=SERVICE_CATEGORY)
+    if response.status_code == 201:
+        category_id = response.json()['id']
+    elif response.status_code == 400:
+        # Category already exists, look it up by name
+        categories = _results(session.get(f'{BASE_URL}/billing/service-categories/'))
+        matching = [c for c in categories if c['name'] == SERVICE_CATEGORY['name']] or categories
+        if not matching:
+            pytest.skip("No service categories found")
+        category_id = matching[0]['id']
+    else:
+        pytest.skip(f"Failed to create service category: {response.text}")
+
+    services_data = [{'category': category_id, **service} for service in SERVICES]
+    response = session.post(f'{BASE_URL}/billing/services/bulk/', json=services_data)
+    if response.status_code == 201:
+        return category_id, [service['id'] for service in response.json()]
+
+    # Services already exist, reuse them in the order they are declared above
+    existing = {
+        service['code']: service['id']
+        for service in _results(session.get(f'{BASE_URL}/billing/services/'))
+    }
+    service_ids = [existing[s['code']] for s in SERVICES if s['code'] in existing]
+    if len(service_ids) < len(SERVICES):
+        service_ids = list(existing.values())[:len(SERVICES)]
+    if len(service_ids) < len(SERVICES):
+        pytest.skip("Not enough services to build an invoice")
+    return category_id, service_ids
+
+
+@pytest.fixture(scope='session')
+def billing_services(auth_session):
+    """(category_id, [service_ids]) for the consultation services, seeded once"""
+    use_cache = os.environ.get('HMS_TEST_SEED_CACHE') == '1'
+    cache = _read_seed_cache() if use_cache else {}
+
+    if BASE_URL in cache:
+        seeded = cache[BASE_URL]
+        return seeded['category_id'], seeded['service_ids']
+
+    category_id, service_ids = _seed_billing_services(auth_session)
+
+    if use_cache:
+        cache[BASE_URL] = {'category_id': category_id, 'service_ids': service_ids}
+        SEED_CACHE_PATH.write_text(json.dumps(cache))
+    return category_id, service_ids
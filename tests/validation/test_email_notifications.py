@@ -1,4 +1,5 @@
 import os
+import uuid
 import django
 from datetime import datetime, timedelta
 
@@ -6,15 +7,34 @@ from datetime import datetime, timedelta
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
 django.setup()
 
+from celery import group
+from kombu.exceptions import OperationalError
+from django.db.models import Count
+from django.template.loader import get_template
 from django.utils import timezone
 from notifications.models import (
     EmailTemplate, EmailNotification, EmailConfiguration,
     EmailSubscription, EmailAnalytics
 )
-from notifications.services import EmailNotificationService, EmailTemplateService
+from notifications.services import EmailTemplateService
+from notifications.tasks import send_email_notification_task
 from accounts.models import User
 from patients.models import Patient
 from appointments.models import Appointment
+from hospital_backend.celery import app as celery_app
+
+def celery_worker_available():
+    """True when tasks run inline or at least one worker answers a ping"""
+    if celery_app.conf.task_always_eager:
+        return True
+    try:
+        return bool(celery_app.control.ping(timeout=1.0))
+    except OperationalError:
+        return False
+
+def load_template_source(name):
+    """Load email template source shipped under notifications/templates"""
+    return get_template(f'notifications/email/{name}').template.source
 
 def test_email_notification_system():
     print("=== Testing Email Notification System ===")
@@ -37,50 +57,8 @@ def test_email_notification_system():
         template_type='appointment_confirmation',
         description='Template for confirming patient appointments',
         subject_template='Appointment Confirmed - {{appointment_date}} at {{appointment_time}}',
-        html_template='''
-        <html>
-        <body>
-            <h2>Appointment Confirmation</h2>
-            <p>Dear {{patient_name}},</p>
-            
-            <p>Your appointment has been confirmed with the following details:</p>
-            
-            <div style="background-color: #f5f5f5; padding: 15px; margin: 10px 0;">
-                <strong>Doctor:</strong> {{doctor_name}}<br>
-                <strong>Date:</strong> {{appointment_date}}<br>
-                <strong>Time:</strong> {{appointment_time}}<br>
-                <strong>Department:</strong> {{department}}<br>
-                <strong>Appointment ID:</strong> {{appointment_id}}
-            </div>
-            
-            <p>Please arrive 15 minutes before your scheduled time.</p>
-            
-            <p>If you need to reschedule or cancel, please contact us at least 24 hours in advance.</p>
-            
-            <p>Best regards,<br>{{hospital_name}}</p>
-        </body>
-        </html>
-        ''',
-        text_template='''
-        Appointment Confirmation
-        
-        Dear {{patient_name}},
-        
-        Your appointment has been confirmed with the following details:
-        
-        Doctor: {{doctor_name}}
-        Date: {{appointment_date}}
-        Time: {{appointment_time}}
-        Department: {{department}}
-        Appointment ID: {{appointment_id}}
-        
-        Please arrive 15 minutes before your scheduled time.
-        
-        If you need to reschedule or cancel, please contact us at least 24 hours in advance.
-        
-        Best regards,
-        {{hospital_name}}
-        ''',
+        html_template=load_template_source('appointment_confirmation.html'),
+        text_template=load_template_source('appointment_confirmation.txt'),
         available_variables=[
             'patient_name', 'doctor_name', 'appointment_date', 'appointment_time',
             'department', 'appointment_id', 'hospital_name'
@@ -96,46 +74,8 @@ def test_email_notification_system():
         template_type='payment_confirmation',
         description='Template for confirming payments',
         subject_template='Payment Received - ${{payment_amount}}',
-        html_template='''
-        <html>
-        <body>
-            <h2>Payment Confirmation</h2>
-            <p>Dear {{patient_name}},</p>
-            
-            <p>We have successfully received your payment:</p>
-            
-            <div style="background-color: #e8f5e8; padding: 15px; margin: 10px 0;">
-                <strong>Amount:</strong> ${{payment_amount}}<br>
-                <strong>Payment Date:</strong> {{payment_date}}<br>
-                <strong>Payment Method:</strong> {{payment_method}}<br>
-                <strong>Transaction ID:</strong> {{transaction_id}}<br>
-                <strong>Invoice Number:</strong> {{invoice_number}}
-            </div>
-            
-            <p>Thank you for your prompt payment.</p>
-            
-            <p>Best regards,<br>{{hospital_name}}</p>
-        </body>
-        </html>
-        ''',
-        text_template='''
-        Payment Confirmation
-        
-        Dear {{patient_name}},
-        
-        We have successfully received your payment:
-        
-        Amount: ${{payment_amount}}
-        Payment Date: {{payment_date}}
-        Payment Method: {{payment_method}}
-        Transaction ID: {{transaction_id}}
-        Invoice Number: {{invoice_number}}
-        
-        Thank you for your prompt payment.
-        
-        Best regards,
-        {{hospital_name}}
-        ''',
+        html_template=load_template_source('payment_confirmation.html'),
+        text_template=load_template_source('payment_confirmation.txt'),
         available_variables=[
             'patient_name', 'payment_amount', 'payment_date', 'payment_method',
             'transaction_id', 'invoice_number', 'hospital_name'
@@ -237,32 +177,36 @@ def test_email_notification_system():
     # Test 5: Create email notifications
     print('\n5. Creating email notifications...')
     
-    email_service = EmailNotificationService()
-    
-    # Create appointment confirmation notification
+    # Both notifications are independent, so fan them out to workers as a group
+    if patient and not celery_worker_available():
+        print('No Celery worker answered; start one or set CELERY_TASK_ALWAYS_EAGER=True')
+        return
     if patient:
-        appointment_notification = email_service.send_notification(
-            template_type='appointment_confirmation',
-            recipient_email=patient.user.email,
-            variables=appointment_variables,
-            recipient_user=patient.user,
-            priority='normal'
+        notification_group = group(
+            send_email_notification_task.s(
+                template_type='appointment_confirmation',
+                recipient_email=patient.user.email,
+                variables=appointment_variables,
+                recipient_user_id=patient.user.id,
+                priority='normal'
+            ),
+            send_email_notification_task.s(
+                template_type='payment_confirmation',
+                recipient_email=patient.user.email,
+                variables=payment_variables,
+                recipient_user_id=patient.user.id,
+                priority='high'
+            ),
         )
+        appointment_id, payment_id = notification_group.apply_async().get(timeout=60)
+        notifications = EmailNotification.objects.in_bulk([appointment_id, payment_id])
+        appointment_notification = notifications[uuid.UUID(appointment_id)]
+        payment_notification = notifications[uuid.UUID(payment_id)]
         
         print(f'✓ Created appointment notification: {appointment_notification.notification_id}')
         print(f'  Recipient: {appointment_notification.recipient_email}')
         print(f'  Status: {appointment_notification.status}')
         print(f'  Subject: {appointment_notification.subject}')
-    
-    # Create payment confirmation notification
-    if patient:
-        payment_notification = email_service.send_notification(
-            template_type='payment_confirmation',
-            recipient_email=patient.user.email,
-            variables=payment_variables,
-            recipient_user=patient.user,
-            priority='high'
-        )
         
         print(f'✓ Created payment notification: {payment_notification.notification_id}')
         print(f'  Recipient: {payment_notification.recipient_email}')
@@ -315,22 +259,21 @@ def test_email_notification_system():
     print(f'  User subscriptions: {total_subscriptions}')
     
     # Notification status breakdown
-    status_counts = {}
-    for status_choice in EmailNotification.STATUS_CHOICES:
-        status = status_choice[0]
-        count = EmailNotification.objects.filter(status=status).count()
-        if count > 0:
-            status_counts[status] = count
+    status_counts = dict(
+        EmailNotification.objects.values('status')
+        .annotate(count=Count('id'))
+        .values_list('status', 'count')
+    )
     
     print(f'  Notification status breakdown: {status_counts}')
     
     # Template type breakdown
-    template_counts = {}
-    for template_type in EmailTemplate.TEMPLATE_TYPES:
-        type_name = template_type[0]
-        count = EmailTemplate.objects.filter(template_type=type_name, is_active=True).count()
-        if count > 0:
-            template_counts[type_name] = count
+    template_counts = dict(
+        EmailTemplate.objects.filter(is_active=True)
+        .values('template_type')
+        .annotate(count=Count('id'))
+        .values_list('template_type', 'count')
+    )
     
     print(f'  Active template types: {template_counts}')
     
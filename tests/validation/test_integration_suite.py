@@ -1,5 +1,9 @@
+import importlib
+import io
 import os
+import sys
 import django
+from contextlib import redirect_stdout
 from datetime import datetime
 
 # Setup Django
@@ -9,7 +13,18 @@ django.setup()
 def test_integration_suite():
     """
     Test the integration testing suite implementation
+    
+    Report lines are buffered in memory and written to stdout in one call.
     """
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            return _check_integration_suite()
+    finally:
+        sys.stdout.write(buffer.getvalue())
+
+
+def _check_integration_suite():
     print("=== Testing Integration Testing Suite Implementation ===")
     
     # Test 1: Check if integration test files exist
@@ -24,8 +39,18 @@ def test_integration_suite():
     existing_files = []
     missing_files = []
     
+    # List each directory once instead of stat()ing every path
+    directory_entries = {}
+    for directory in {os.path.dirname(test_file) or '.' for test_file in integration_test_files}:
+        try:
+            with os.scandir(directory) as entries:
+                directory_entries[directory] = {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            directory_entries[directory] = set()
+    
     for test_file in integration_test_files:
-        if os.path.exists(test_file):
+        directory, filename = os.path.split(test_file)
+        if filename in directory_entries[directory or '.']:
             existing_files.append(test_file)
             print(f"  ✓ {test_file}")
         else:
@@ -54,8 +79,9 @@ def test_integration_suite():
             'print_summary'
         ]
         
+        missing_methods = set(required_methods) - set(dir(runner))
         for method in required_methods:
-            if hasattr(runner, method):
+            if method not in missing_methods:
                 print(f"    ✓ {method} method available")
             else:
                 print(f"    ✗ {method} method missing")
@@ -102,11 +128,13 @@ def test_integration_suite():
         'Workflow Integration': 'tests.test_integration.PatientManagementIntegrationTest'
     }
     
+    module_cache = {}
     for category, module in integration_test_categories.items():
         try:
-            module_parts = module.split('.')
-            test_module = __import__('.'.join(module_parts[:-1]), fromlist=[module_parts[-1]])
-            test_class = getattr(test_module, module_parts[-1])
+            module_path, class_name = module.rsplit('.', 1)
+            if module_path not in module_cache:
+                module_cache[module_path] = importlib.import_module(module_path)
+            test_class = getattr(module_cache[module_path], class_name)
             print(f"  ✓ {category} test class available")
         except Exception as e:
             print(f"  ⚠ {category} test class error: {e}")
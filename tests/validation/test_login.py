@@ -1,76 +1,54 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import json
 
-BASE_URL = 'http://localhost:8000/api'
+from _auth import BASE_URL
+from _http import build_session
+from _payloads import DOCTOR_EMAIL_LOGIN_BODY, DOCTOR_USERNAME_LOGIN_BODY, JSON_HEADERS, LOGIN_BODY
 
-def test_login():
-    print("Testing login...")
-    
-    # Test login with admin first
-    admin_login_data = {
-        'email': 'admin@hospital.com',
-        'password': 'admin123'
-    }
+logger = logging.getLogger(__name__)
+
+# Unauthenticated session; the attempts below are independent so they run concurrently
+SESSION = build_session()
 
-    print(f"Testing admin login: {admin_login_data['email']}")
+ATTEMPTS = [
+    ('Admin', LOGIN_BODY),
+    ('Email', DOCTOR_EMAIL_LOGIN_BODY),
+    ('Username', DOCTOR_USERNAME_LOGIN_BODY),
+]
 
+
+def _post_login(attempt):
+    label, body = attempt
     try:
-        response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=admin_login_data)
-        print(f"Admin login - Status Code: {response.status_code}")
-        print(f"Admin login - Response: {response.text}")
+        return label, SESSION.post(f'{BASE_URL}/accounts/auth/login/', data=body, headers=JSON_HEADERS)
+    except requests.RequestException as e:
+        return label, e
 
-        if response.status_code == 200:
-            data = response.json()
-            print(f"Admin login successful!")
-            return data.get('access')
-    except Exception as e:
-        print(f"Admin login error: {e}")
 
-    # Test login with email
-    login_data = {
-        'email': 'doctor.test@hospital.com',
-        'password': 'securepass123'
-    }
+def _attempt_logins():
+    logger.info("Testing login...")
 
-    print(f"Attempting login with email: {login_data['email']}")
+    with ThreadPoolExecutor(max_workers=len(ATTEMPTS)) as executor:
+        results = list(executor.map(_post_login, ATTEMPTS))
 
-    try:
-        response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=login_data)
-        print(f"Email login - Status Code: {response.status_code}")
-        print(f"Email login - Response: {response.text}")
-
-        if response.status_code == 200:
-            data = response.json()
-            print(f"Email login successful!")
-            return data.get('access')
-    except Exception as e:
-        print(f"Email login error: {e}")
-
-    # Try with username instead
-    login_data_username = {
-        'username': 'doctor.test@hospital.com',
-        'password': 'securepass123'
-    }
-    
-    print(f"Attempting username login: {login_data_username['username']}")
+    token = None
+    for label, response in results:
+        if isinstance(response, Exception):
+            logger.warning("%s login error: %s", label, response)
+            continue
 
-    try:
-        response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=login_data_username)
-        print(f"Username login - Status Code: {response.status_code}")
-        print(f"Username login - Response: {response.text}")
-
-        if response.status_code == 200:
-            data = response.json()
-            print(f"Username login successful!")
-            print(f"Access token: {data.get('access', 'N/A')[:50]}...")
-            return data.get('access')
-        else:
-            print(f"Username login failed: {response.text}")
-            return None
-
-    except Exception as e:
-        print(f"Username login error: {e}")
-        return None
-
-if __name__ == '__main__':
-    test_login()
+        logger.info("%s login - Status Code: %s", label, response.status_code)
+        logger.debug("%s login - Response: %s", label, response.text)
+
+        if response.status_code == 200 and token is None:
+            token = response.json().get('access')
+            logger.info("%s login successful!", label)
+            logger.debug("Access token: %s...", token[:50])
+
+    return token
+
+
+def test_login():
+    assert _attempt_logins(), "No login attempt returned an access token"
@@ -1,61 +1,48 @@
-import os
-import django
-import requests
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
-django.setup()
+import pytest
 
-BASE_URL = 'http://localhost:8000/api'
+from _auth import BASE_URL
+from _http import do_request
 
-def test_medical_alerts_system():
-    print("Testing Medical Alerts System...")
-    
-    # Login as admin to have full access
-    login_data = {
-        'email': 'admin@hospital.com',
-        'password': 'admin123'
-    }
-    
-    login_response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=login_data)
-    print(f"Login Status: {login_response.status_code}")
-    
-    if login_response.status_code != 200:
-        print("Login failed!")
-        return
-    
-    token = login_response.json()['access']
-    headers = {'Authorization': f'Bearer {token}'}
+logger = logging.getLogger(__name__)
+
+# Must stay <= the auth_session adapter's pool_maxsize so no worker waits on a connection
+READ_WORKERS = 8
+
+
+def test_medical_alerts_system(auth_session):
+    logger.info("Testing Medical Alerts System...")
     
-    print("\n=== Testing Medical Alerts System ===")
+    logger.info("=== Testing Medical Alerts System ===")
     
     # First, get patient and medical record IDs
-    print("\n0. Getting patient and medical record information...")
+    logger.info("0. Getting patient and medical record information...")
     
     # Get patient
-    patients_response = requests.get(f'{BASE_URL}/patients/patients/', headers=headers)
+    patients_response = auth_session.get(f'{BASE_URL}/patients/patients/')
     if patients_response.status_code == 200 and patients_response.json()['results']:
         patient_data = patients_response.json()['results'][0]
         patient_uuid = patient_data['id']
         patient_id = patient_data['patient_id']
         patient_name = patient_data.get('name', patient_data.get('user', {}).get('first_name', 'Unknown'))
-        print(f"✓ Using patient: {patient_name} ({patient_id})")
+        logger.info("✓ Using patient: %s (%s)", patient_name, patient_id)
     else:
-        print("No patients found. Please create one first.")
-        return
+        pytest.fail("No patients found. Please create one first.")
     
     # Get medical record
-    records_response = requests.get(f'{BASE_URL}/medical-records/medical-records/', headers=headers)
+    records_response = auth_session.get(f'{BASE_URL}/medical-records/medical-records/')
     if records_response.status_code == 200 and records_response.json()['results']:
         medical_record_id = records_response.json()['results'][0]['id']
-        print(f"✓ Using medical record: {medical_record_id}")
+        logger.info("✓ Using medical record: %s", medical_record_id)
     else:
-        print("No medical records found. Please create one first.")
-        return
+        pytest.fail("No medical records found. Please create one first.")
     
-    # Test 1: Create an allergy alert
-    print("\n1. Testing allergy alert creation...")
+    # Test 1: Create allergy, drug interaction and critical condition alerts in one request
+    logger.info("1. Testing bulk alert creation...")
     allergy_alert_data = {
         'patient': patient_uuid,
         'medical_record': medical_record_id,
@@ -71,27 +58,6 @@ def test_medical_alerts_system():
         }
     }
     
-    create_allergy_alert_response = requests.post(
-        f'{BASE_URL}/medical-records/alerts/',
-        json=allergy_alert_data,
-        headers=headers
-    )
-    print(f"Create Allergy Alert Status: {create_allergy_alert_response.status_code}")
-    
-    if create_allergy_alert_response.status_code == 201:
-        allergy_alert = create_allergy_alert_response.json()
-        allergy_alert_id = allergy_alert['id']
-        print(f"✓ Created allergy alert: {allergy_alert['title']}")
-        print(f"  Alert Type: {allergy_alert['alert_type']}")
-        print(f"  Severity: {allergy_alert['severity']}")
-        print(f"  Status: {allergy_alert['status']}")
-        print(f"  Triggered by: {allergy_alert['triggered_by_name']}")
-    else:
-        print(f"Failed to create allergy alert: {create_allergy_alert_response.text}")
-        return
-    
-    # Test 2: Create a drug interaction alert
-    print("\n2. Testing drug interaction alert creation...")
     drug_interaction_alert_data = {
         'patient': patient_uuid,
         'medical_record': medical_record_id,
@@ -108,25 +74,6 @@ def test_medical_alerts_system():
         }
     }
     
-    create_drug_alert_response = requests.post(
-        f'{BASE_URL}/medical-records/alerts/',
-        json=drug_interaction_alert_data,
-        headers=headers
-    )
-    print(f"Create Drug Interaction Alert Status: {create_drug_alert_response.status_code}")
-    
-    if create_drug_alert_response.status_code == 201:
-        drug_alert = create_drug_alert_response.json()
-        drug_alert_id = drug_alert['id']
-        print(f"✓ Created drug interaction alert: {drug_alert['title']}")
-        print(f"  Alert Type: {drug_alert['alert_type']}")
-        print(f"  Severity: {drug_alert['severity']}")
-    else:
-        print(f"Failed to create drug interaction alert: {create_drug_alert_response.text}")
-        return
-    
-    # Test 3: Create a critical condition alert
-    print("\n3. Testing critical condition alert creation...")
     critical_alert_data = {
         'patient': patient_uuid,
         'medical_record': medical_record_id,
@@ -143,119 +90,118 @@ def test_medical_alerts_system():
         }
     }
     
-    create_critical_alert_response = requests.post(
+    alerts_payload = [allergy_alert_data, drug_interaction_alert_data, critical_alert_data]
+    create_alerts_response = auth_session.post(
         f'{BASE_URL}/medical-records/alerts/',
-        json=critical_alert_data,
-        headers=headers
+        json=alerts_payload
     )
-    print(f"Create Critical Alert Status: {create_critical_alert_response.status_code}")
+    logger.info("Create Alerts Status: %s", create_alerts_response.status_code)
     
-    if create_critical_alert_response.status_code == 201:
-        critical_alert = create_critical_alert_response.json()
+    if create_alerts_response.status_code == 201:
+        allergy_alert, drug_alert, critical_alert = create_alerts_response.json()
+        allergy_alert_id = allergy_alert['id']
+        drug_alert_id = drug_alert['id']
         critical_alert_id = critical_alert['id']
-        print(f"✓ Created critical condition alert: {critical_alert['title']}")
-        print(f"  Alert Type: {critical_alert['alert_type']}")
-        print(f"  Severity: {critical_alert['severity']}")
+        for alert in (allergy_alert, drug_alert, critical_alert):
+            logger.info("✓ Created %s alert: %s", alert['alert_type'], alert['title'])
+            logger.info("  Severity: %s", alert['severity'])
+            logger.info("  Status: %s", alert['status'])
+            logger.info("  Triggered by: %s", alert['triggered_by_name'])
+    else:
+        pytest.fail(f"Failed to create alerts: {create_alerts_response.status_code} {create_alerts_response.text}")
+    
+    # Test 2: Acknowledge an alert
+    logger.info("2. Testing alert acknowledgment...")
+    acknowledge_response = auth_session.post(
+        f'{BASE_URL}/medical-records/alerts/{allergy_alert_id}/acknowledge/',
+        json={}
+    )
+    logger.info("Acknowledge Alert Status: %s", acknowledge_response.status_code)
+    
+    if acknowledge_response.status_code == 200:
+        acknowledged_alert = acknowledge_response.json()
+        logger.info("✓ Alert acknowledged")
+        logger.info("  Status: %s", acknowledged_alert['status'])
+        logger.info("  Acknowledged by: %s", acknowledged_alert['acknowledged_by_name'])
+        logger.info("  Acknowledged at: %s", acknowledged_alert['acknowledged_at'])
+    else:
+        logger.warning("Failed to acknowledge alert: %s", acknowledge_response.text)
+    
+    # Test 3: Resolve an alert
+    logger.info("3. Testing alert resolution...")
+    resolve_response = auth_session.post(
+        f'{BASE_URL}/medical-records/alerts/{drug_alert_id}/resolve/',
+        json={'resolution_notes': 'Aspirin discontinued. Patient switched to acetaminophen for pain management. INR levels normalized.'}
+    )
+    logger.info("Resolve Alert Status: %s", resolve_response.status_code)
+    
+    if resolve_response.status_code == 200:
+        resolved_alert = resolve_response.json()
+        logger.info("✓ Alert resolved")
+        logger.info("  Status: %s", resolved_alert['status'])
+        logger.info("  Resolved by: %s", resolved_alert['resolved_by_name'])
+        logger.info("  Resolution notes: %s...", resolved_alert['resolution_notes'][:100])
     else:
-        print(f"Failed to create critical alert: {create_critical_alert_response.text}")
-        return
+        logger.warning("Failed to resolve alert: %s", resolve_response.text)
+    
+    # Dispatch the read-only checks concurrently and report them in order
+    read_checks = [
+        ('list', 'GET', f'{BASE_URL}/medical-records/alerts/', None),
+        ('by_patient', 'GET', f'{BASE_URL}/medical-records/alerts/by_patient/', {'patient_id': patient_id}),
+        ('critical', 'GET', f'{BASE_URL}/medical-records/alerts/by_patient/', {'patient_id': patient_id, 'severity': 'critical'}),
+        ('allergy', 'GET', f'{BASE_URL}/medical-records/alerts/by_patient/', {'patient_id': patient_id, 'alert_type': 'allergy'}),
+    ]
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        responses = dict(executor.map(partial(do_request, auth_session), read_checks))
     
     # Test 4: List all alerts
-    print("\n4. Testing alerts listing...")
-    list_alerts_response = requests.get(f'{BASE_URL}/medical-records/alerts/', headers=headers)
-    print(f"List Alerts Status: {list_alerts_response.status_code}")
+    logger.info("4. Testing alerts listing...")
+    list_alerts_response = responses['list']
+    logger.info("List Alerts Status: %s", list_alerts_response.status_code)
     
     if list_alerts_response.status_code == 200:
         alerts_data = list_alerts_response.json()
         alerts_list = alerts_data if isinstance(alerts_data, list) else alerts_data.get('results', [])
-        print(f"✓ Retrieved {len(alerts_list)} medical alerts")
+        logger.info("✓ Retrieved %s medical alerts", len(alerts_list))
         
         for alert in alerts_list[:3]:
-            print(f"  - {alert['title']}: {alert['alert_type']} ({alert['severity']})")
+            logger.info("  - %s: %s (%s)", alert['title'], alert['alert_type'], alert['severity'])
     
     # Test 5: Get alerts by patient
-    print("\n5. Testing patient alerts history...")
-    patient_alerts_response = requests.get(
-        f'{BASE_URL}/medical-records/alerts/by_patient/?patient_id={patient_id}',
-        headers=headers
-    )
-    print(f"Patient Alerts Status: {patient_alerts_response.status_code}")
+    logger.info("5. Testing patient alerts history...")
+    patient_alerts_response = responses['by_patient']
+    logger.info("Patient Alerts Status: %s", patient_alerts_response.status_code)
     
     if patient_alerts_response.status_code == 200:
         patient_alerts = patient_alerts_response.json()
-        print(f"✓ Retrieved patient alerts history")
-        print(f"  Patient: {patient_alerts['patient']['name']}")
-        print(f"  Total Alerts: {patient_alerts['total_alerts']}")
+        logger.info("✓ Retrieved patient alerts history")
+        logger.info("  Patient: %s", patient_alerts['patient']['name'])
+        logger.info("  Total Alerts: %s", patient_alerts['total_alerts'])
         
         if patient_alerts['statistics']:
             stats = patient_alerts['statistics']
-            print(f"  Statistics:")
-            print(f"    Active Alerts: {stats['active_alerts']}")
-            print(f"    Critical Alerts: {stats['critical_alerts']}")
-            print(f"    By Severity: {stats['by_severity']}")
-            print(f"    By Type: {stats['by_type']}")
+            logger.info("  Statistics:")
+            logger.info("    Active Alerts: %s", stats['active_alerts'])
+            logger.info("    Critical Alerts: %s", stats['critical_alerts'])
+            logger.info("    By Severity: %s", stats['by_severity'])
+            logger.info("    By Type: %s", stats['by_type'])
     
-    # Test 6: Acknowledge an alert
-    print("\n6. Testing alert acknowledgment...")
-    acknowledge_response = requests.post(
-        f'{BASE_URL}/medical-records/alerts/{allergy_alert_id}/acknowledge/',
-        json={},
-        headers=headers
-    )
-    print(f"Acknowledge Alert Status: {acknowledge_response.status_code}")
-    
-    if acknowledge_response.status_code == 200:
-        acknowledged_alert = acknowledge_response.json()
-        print(f"✓ Alert acknowledged")
-        print(f"  Status: {acknowledged_alert['status']}")
-        print(f"  Acknowledged by: {acknowledged_alert['acknowledged_by_name']}")
-        print(f"  Acknowledged at: {acknowledged_alert['acknowledged_at']}")
-    else:
-        print(f"Failed to acknowledge alert: {acknowledge_response.text}")
-    
-    # Test 7: Resolve an alert
-    print("\n7. Testing alert resolution...")
-    resolve_response = requests.post(
-        f'{BASE_URL}/medical-records/alerts/{drug_alert_id}/resolve/',
-        json={'resolution_notes': 'Aspirin discontinued. Patient switched to acetaminophen for pain management. INR levels normalized.'},
-        headers=headers
-    )
-    print(f"Resolve Alert Status: {resolve_response.status_code}")
-    
-    if resolve_response.status_code == 200:
-        resolved_alert = resolve_response.json()
-        print(f"✓ Alert resolved")
-        print(f"  Status: {resolved_alert['status']}")
-        print(f"  Resolved by: {resolved_alert['resolved_by_name']}")
-        print(f"  Resolution notes: {resolved_alert['resolution_notes'][:100]}...")
-    else:
-        print(f"Failed to resolve alert: {resolve_response.text}")
-    
-    # Test 8: Filter alerts by severity
-    print("\n8. Testing alert filtering...")
-    critical_alerts_response = requests.get(
-        f'{BASE_URL}/medical-records/alerts/by_patient/?patient_id={patient_id}&severity=critical',
-        headers=headers
-    )
-    print(f"Critical Alerts Filter Status: {critical_alerts_response.status_code}")
+    # Test 6: Filter alerts by severity
+    logger.info("6. Testing alert filtering...")
+    critical_alerts_response = responses['critical']
+    logger.info("Critical Alerts Filter Status: %s", critical_alerts_response.status_code)
     
     if critical_alerts_response.status_code == 200:
         critical_alerts = critical_alerts_response.json()
-        print(f"✓ Found {critical_alerts['total_alerts']} critical alerts")
+        logger.info("✓ Found %s critical alerts", critical_alerts['total_alerts'])
     
-    # Test 9: Filter alerts by type
-    print("\n9. Testing alert type filtering...")
-    allergy_alerts_response = requests.get(
-        f'{BASE_URL}/medical-records/alerts/by_patient/?patient_id={patient_id}&alert_type=allergy',
-        headers=headers
-    )
-    print(f"Allergy Alerts Filter Status: {allergy_alerts_response.status_code}")
+    # Test 7: Filter alerts by type
+    logger.info("7. Testing alert type filtering...")
+    allergy_alerts_response = responses['allergy']
+    logger.info("Allergy Alerts Filter Status: %s", allergy_alerts_response.status_code)
     
     if allergy_alerts_response.status_code == 200:
         allergy_alerts = allergy_alerts_response.json()
-        print(f"✓ Found {allergy_alerts['total_alerts']} allergy alerts")
+        logger.info("✓ Found %s allergy alerts", allergy_alerts['total_alerts'])
     
-    print("\n=== Medical Alerts System Testing Complete ===")
-
-if __name__ == '__main__':
-    test_medical_alerts_system()
+    logger.info("=== Medical Alerts System Testing Complete ===")
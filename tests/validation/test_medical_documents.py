@@ -1,55 +1,58 @@
+import argparse
+import io
+import logging
 import os
-import django
-import requests
-from datetime import datetime, timedelta
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
-django.setup()
+import pytest
 
-BASE_URL = 'http://localhost:8000/api'
+from _auth import BASE_URL, get_admin_token
+from _http import conditional_get, gzip_post, new_session, read_last_record_id
 
-def create_test_file(filename, content):
-    """Create a temporary test file"""
-    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix=f'.{filename.split(".")[-1]}', delete=False)
-    temp_file.write(content)
-    temp_file.close()
-    return temp_file.name
+logger = logging.getLogger(__name__)
 
-def test_medical_document_storage():
-    print("Testing Medical Document Storage System...")
-    
-    # Login as admin to have full access
-    login_data = {
-        'email': 'admin@hospital.com',
-        'password': 'admin123'
-    }
-    
-    login_response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=login_data)
-    print(f"Login Status: {login_response.status_code}")
-    
-    if login_response.status_code != 200:
-        print("Login failed!")
-        return
-    
-    token = login_response.json()['access']
-    headers = {'Authorization': f'Bearer {token}'}
-    
-    print("\n=== Testing Medical Document Storage System ===")
+
+def test_medical_document_storage(medical_record_id=None):
+    logger.info("Testing Medical Document Storage System...")
     
-    # First, get a medical record ID to associate documents
-    print("\n0. Getting existing medical record...")
-    records_response = requests.get(f'{BASE_URL}/medical-records/medical-records/', headers=headers)
-    if records_response.status_code == 200 and records_response.json()['results']:
-        medical_record_id = records_response.json()['results'][0]['id']
-        print(f"✓ Using medical record: {medical_record_id}")
-    else:
-        print("No medical records found. Please create one first.")
-        return
+    # One pooled keep-alive session for every call in this test
+    session = new_session()
     
-    # Test 1: Upload a lab report document
-    print("\n1. Testing document upload (Lab Report)...")
+    # Login as admin to have full access
+    token = get_admin_token(session)
+    
+    if not token:
+        pytest.fail("Login failed!")
+    
+    session.headers.update({'Authorization': f'Bearer {token}'})
+    
+    logger.info("=== Testing Medical Document Storage System ===")
+    
+    # First, get a medical record ID to associate documents: the one passed in,
+    # else the one test_medical_history.py last created on this server, else
+    # the first listed
+    logger.info("0. Getting existing medical record...")
+    if medical_record_id is None:
+        medical_record_id = read_last_record_id(BASE_URL)
+        # The database may have been reset since that run
+        if medical_record_id is not None and session.get(
+            f'{BASE_URL}/medical-records/medical-records/{medical_record_id}/', params={'fields': 'id'}
+        ).status_code == 404:
+            logger.info("Cached medical record %s is gone, looking one up", medical_record_id)
+            medical_record_id = None
+    if medical_record_id is None:
+        records_response = session.get(
+            f'{BASE_URL}/medical-records/medical-records/', params={'page_size': 1, 'fields': 'id'}
+        )
+        if records_response.status_code == 200 and records_response.json()['results']:
+            medical_record_id = records_response.json()['results'][0]['id']
+        else:
+            pytest.fail("No medical records found. Please create one first.")
+    logger.info("✓ Using medical record: %s", medical_record_id)
+    
+    # Test 1: Upload a lab report and an imaging report in one request
+    logger.info("1. Testing batched document upload (Lab Report + Imaging)...")
     
     # Create a test lab report file
     lab_report_content = """
@@ -67,46 +70,6 @@ def test_medical_document_storage():
     Results: All values within normal limits.
     """
     
-    lab_file_path = create_test_file('lab_report.txt', lab_report_content)
-    
-    try:
-        with open(lab_file_path, 'rb') as lab_file:
-            document_data = {
-                'medical_record': medical_record_id,
-                'title': 'Complete Blood Count - June 2025',
-                'document_type': 'lab_report',
-                'description': 'Routine CBC test showing normal values across all parameters',
-                'is_confidential': True
-            }
-            
-            files = {'file': ('lab_report.txt', lab_file, 'text/plain')}
-            
-            upload_response = requests.post(
-                f'{BASE_URL}/medical-records/documents/',
-                data=document_data,
-                files=files,
-                headers=headers
-            )
-            print(f"Upload Lab Report Status: {upload_response.status_code}")
-            
-            if upload_response.status_code == 201:
-                lab_document = upload_response.json()
-                lab_document_id = lab_document['id']
-                print(f"✓ Uploaded lab report: {lab_document['title']}")
-                print(f"  Document Type: {lab_document['document_type']}")
-                print(f"  File Size: {lab_document['file_size']} bytes")
-                print(f"  MIME Type: {lab_document['mime_type']}")
-                print(f"  Confidential: {lab_document['is_confidential']}")
-            else:
-                print(f"Failed to upload lab report: {upload_response.text}")
-                return
-    finally:
-        # Clean up temp file
-        os.unlink(lab_file_path)
-    
-    # Test 2: Upload an imaging document
-    print("\n2. Testing document upload (Imaging)...")
-    
     # Create a test imaging report
     imaging_content = """
     RADIOLOGY REPORT
@@ -126,148 +89,194 @@ def test_medical_document_storage():
     Normal chest X-ray.
     """
     
-    imaging_file_path = create_test_file('chest_xray_report.txt', imaging_content)
-    
-    try:
-        with open(imaging_file_path, 'rb') as imaging_file:
-            imaging_data = {
-                'medical_record': medical_record_id,
-                'title': 'Chest X-Ray Report - June 2025',
-                'document_type': 'imaging',
-                'description': 'Routine chest X-ray showing normal findings',
-                'is_confidential': True
-            }
-            
-            files = {'file': ('chest_xray_report.txt', imaging_file, 'text/plain')}
-            
-            upload_imaging_response = requests.post(
-                f'{BASE_URL}/medical-records/documents/',
-                data=imaging_data,
-                files=files,
-                headers=headers
-            )
-            print(f"Upload Imaging Status: {upload_imaging_response.status_code}")
-            
-            if upload_imaging_response.status_code == 201:
-                imaging_document = upload_imaging_response.json()
-                imaging_document_id = imaging_document['id']
-                print(f"✓ Uploaded imaging report: {imaging_document['title']}")
-                print(f"  Document Type: {imaging_document['document_type']}")
-                print(f"  File Size: {imaging_document['file_size']} bytes")
-            else:
-                print(f"Failed to upload imaging report: {upload_imaging_response.text}")
-                return
-    finally:
-        # Clean up temp file
-        os.unlink(imaging_file_path)
-    
-    # Test 3: List all documents
-    print("\n3. Testing document listing...")
-    list_documents_response = requests.get(f'{BASE_URL}/medical-records/documents/', headers=headers)
-    print(f"List Documents Status: {list_documents_response.status_code}")
+    # Upload straight from in-memory buffers; no temp files to write or clean up
+    lab_file = io.BytesIO(lab_report_content.encode())
+    imaging_file = io.BytesIO(imaging_content.encode())
+    
+    # Metadata fields are repeated once per file, in file order
+    document_data = [
+        ('medical_record', medical_record_id),
+        ('title', 'Complete Blood Count - June 2025'),
+        ('title', 'Chest X-Ray Report - June 2025'),
+        ('document_type', 'lab_report'),
+        ('document_type', 'imaging'),
+        ('description', 'Routine CBC test showing normal values across all parameters'),
+        ('description', 'Routine chest X-ray showing normal findings'),
+        ('is_confidential', True),
+    ]
+    
+    files = [
+        ('file', ('lab_report.txt', lab_file, 'text/plain')),
+        ('file', ('chest_xray_report.txt', imaging_file, 'text/plain')),
+    ]
+    
+    # The text reports compress well, so send the multipart body gzipped
+    upload_response = gzip_post(
+        session,
+        f'{BASE_URL}/medical-records/documents/bulk/',
+        data=document_data,
+        files=files
+    )
+    logger.info("Upload Documents Status: %s", upload_response.status_code)
+    
+    if upload_response.status_code == 201:
+        lab_document, imaging_document = upload_response.json()
+        lab_document_id = lab_document['id']
+        imaging_document_id = imaging_document['id']
+        logger.info("✓ Uploaded lab report: %s", lab_document['title'])
+        logger.info("  Document Type: %s", lab_document['document_type'])
+        logger.info("  File Size: %s bytes", lab_document['file_size'])
+        logger.info("  MIME Type: %s", lab_document['mime_type'])
+        logger.info("  Confidential: %s", lab_document['is_confidential'])
+        logger.info("✓ Uploaded imaging report: %s", imaging_document['title'])
+        logger.info("  Document Type: %s", imaging_document['document_type'])
+        logger.info("  File Size: %s bytes", imaging_document['file_size'])
+    else:
+        pytest.fail(f"Failed to upload documents: {upload_response.status_code} {upload_response.text}")
+    
+    # Read the clock once and format once; both bounds come from the same day
+    today = date.today()
+    today_s = today.isoformat()
+    yesterday_s = (today - timedelta(days=1)).isoformat()
+    
+    # Dispatch the read-only checks concurrently and report them in order;
+    # list checks ask only for the fields they log
+    read_checks = [
+        ('list', f'{BASE_URL}/medical-records/documents/', {'fields': 'title,document_type,file_size'}),
+        ('by_patient', f'{BASE_URL}/medical-records/documents/by_patient/', {'patient_id': 'P000001'}),
+        ('by_type', f'{BASE_URL}/medical-records/documents/by_type/', {
+            'type': 'lab_report', 'fields': 'title,upload_date'
+        }),
+        ('download', f'{BASE_URL}/medical-records/documents/{lab_document_id}/download/', None),
+        ('statistics', f'{BASE_URL}/medical-records/documents/statistics/', None),
+        ('date_range', f'{BASE_URL}/medical-records/documents/by_type/', {
+            'type': 'imaging', 'date_from': yesterday_s, 'date_to': today_s, 'fields': 'id'
+        }),
+    ]
+    
+    def fetch(check):
+        name, url, params = check
+        if name == 'statistics':
+            # Revalidate against the last run's ETag instead of recomputing
+            return name, conditional_get(session, url, params)
+        if name == 'download':
+            # Only the JSON metadata is kept; stream so a file body is never
+            # buffered. The file body is drained in chunks, because closing a
+            # response with unread data drops its connection instead of
+            # returning it to the pool
+            with session.get(url, params=params, stream=True) as response:
+                if response.headers.get('Content-Type', '').startswith('application/json'):
+                    response.content
+                else:
+                    for _ in response.iter_content(65536):
+                        pass
+            return name, response
+        return name, session.get(url, params=params)
+    
+    with ThreadPoolExecutor(max_workers=len(read_checks)) as executor:
+        responses = dict(executor.map(fetch, read_checks))
+    
+    # Test 2: List all documents
+    logger.info("2. Testing document listing...")
+    list_documents_response = responses['list']
+    logger.info("List Documents Status: %s", list_documents_response.status_code)
     
     if list_documents_response.status_code == 200:
         documents_data = list_documents_response.json()
         documents_list = documents_data if isinstance(documents_data, list) else documents_data.get('results', [])
-        print(f"✓ Retrieved {len(documents_list)} documents")
+        logger.info("✓ Retrieved %s documents", len(documents_list))
         
-        for document in documents_list[:3]:
-            print(f"  - {document['title']}: {document['document_type']} ({document['file_size']} bytes)")
-    
-    # Test 4: Get documents by patient
-    print("\n4. Testing patient document history...")
-    patient_documents_response = requests.get(
-        f'{BASE_URL}/medical-records/documents/by_patient/?patient_id=P000001',
-        headers=headers
-    )
-    print(f"Patient Documents Status: {patient_documents_response.status_code}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for document in documents_list[:3]:
+                logger.debug("  - %s: %s (%s bytes)", document['title'], document['document_type'], document['file_size'])
+    
+    # Test 3: Get documents by patient
+    logger.info("3. Testing patient document history...")
+    patient_documents_response = responses['by_patient']
+    logger.info("Patient Documents Status: %s", patient_documents_response.status_code)
     
     if patient_documents_response.status_code == 200:
         patient_documents = patient_documents_response.json()
-        print(f"✓ Retrieved patient document history")
-        print(f"  Patient: {patient_documents['patient']['name']}")
-        print(f"  Total Documents: {patient_documents['total_documents']}")
-        print(f"  Confidential: {patient_documents['statistics']['confidential']}")
-        print(f"  Recent Uploads: {patient_documents['statistics']['recent_uploads']}")
+        logger.info("✓ Retrieved patient document history")
+        logger.info("  Patient: %s", patient_documents['patient']['name'])
+        logger.info("  Total Documents: %s", patient_documents['total_documents'])
+        logger.info("  Confidential: %s", patient_documents['statistics']['confidential'])
+        logger.info("  Recent Uploads: %s", patient_documents['statistics']['recent_uploads'])
         
-        print(f"  Document Groups:")
-        for doc_type, group_data in patient_documents['document_groups'].items():
-            if group_data['count'] > 0:
-                print(f"    - {group_data['name']}: {group_data['count']} documents")
-    
-    # Test 5: Get documents by type
-    print("\n5. Testing document filtering by type...")
-    lab_documents_response = requests.get(
-        f'{BASE_URL}/medical-records/documents/by_type/?type=lab_report',
-        headers=headers
-    )
-    print(f"Lab Documents Status: {lab_documents_response.status_code}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Document Groups:")
+            for doc_type, group_data in patient_documents['document_groups'].items():
+                if group_data['count'] > 0:
+                    logger.debug("    - %s: %s documents", group_data['name'], group_data['count'])
+    
+    # Test 4: Get documents by type
+    logger.info("4. Testing document filtering by type...")
+    lab_documents_response = responses['by_type']
+    logger.info("Lab Documents Status: %s", lab_documents_response.status_code)
     
     if lab_documents_response.status_code == 200:
         lab_documents = lab_documents_response.json()
         lab_docs_list = lab_documents if isinstance(lab_documents, list) else lab_documents.get('results', [])
-        print(f"✓ Found {len(lab_docs_list)} lab report documents")
+        logger.info("✓ Found %s lab report documents", len(lab_docs_list))
         
-        for doc in lab_docs_list[:3]:
-            print(f"  - {doc['title']}: {doc['upload_date']}")
-    
-    # Test 6: Download a document
-    print("\n6. Testing document download...")
-    download_response = requests.get(
-        f'{BASE_URL}/medical-records/documents/{lab_document_id}/download/',
-        headers=headers
-    )
-    print(f"Download Status: {download_response.status_code}")
-    
-    if download_response.status_code == 200:
+        if logger.isEnabledFor(logging.DEBUG):
+            for doc in lab_docs_list[:3]:
+                logger.debug("  - %s: %s", doc['title'], doc['upload_date'])
+    
+    # Test 5: Download a document
+    logger.info("5. Testing document download...")
+    download_response = responses['download']
+    logger.info("Download Status: %s", download_response.status_code)
+    
+    if download_response.status_code == 200 and not download_response.headers.get('Content-Type', '').startswith('application/json'):
+        logger.info("✓ Document served directly as %s", download_response.headers.get('Content-Type'))
+    elif download_response.status_code == 200:
         download_data = download_response.json()
-        print(f"✓ Document download prepared")
-        print(f"  Download URL: {download_data['download_url']}")
-        print(f"  Filename: {download_data['filename']}")
-        print(f"  File Size: {download_data['file_size']} bytes")
-        print(f"  MIME Type: {download_data['mime_type']}")
+        logger.info("✓ Document download prepared")
+        logger.info("  Download URL: %s", download_data['download_url'])
+        logger.info("  Filename: %s", download_data['filename'])
+        logger.info("  File Size: %s bytes", download_data['file_size'])
+        logger.info("  MIME Type: %s", download_data['mime_type'])
     else:
-        print(f"Failed to prepare download: {download_response.text}")
+        logger.warning("Failed to prepare download: %s", download_response.text)
     
-    # Test 7: Get document statistics
-    print("\n7. Testing document statistics...")
-    stats_response = requests.get(
-        f'{BASE_URL}/medical-records/documents/statistics/',
-        headers=headers
-    )
-    print(f"Statistics Status: {stats_response.status_code}")
+    # Test 6: Get document statistics
+    logger.info("6. Testing document statistics...")
+    stats_response = responses['statistics']
+    logger.info("Statistics Status: %s", stats_response.status_code)
     
     if stats_response.status_code == 200:
         stats = stats_response.json()
-        print(f"✓ Retrieved document statistics")
-        print(f"  Total Documents: {stats['total_documents']}")
-        print(f"  Confidential: {stats['confidential_documents']}")
-        print(f"  Public: {stats['public_documents']}")
-        print(f"  Recent (30 days): {stats['recent_documents_30_days']}")
-        print(f"  Total File Size: {stats['total_file_size_mb']} MB")
+        logger.info("✓ Retrieved document statistics")
+        logger.info("  Total Documents: %s", stats['total_documents'])
+        logger.info("  Confidential: %s", stats['confidential_documents'])
+        logger.info("  Public: %s", stats['public_documents'])
+        logger.info("  Recent (30 days): %s", stats['recent_documents_30_days'])
+        logger.info("  Total File Size: %s MB", stats['total_file_size_mb'])
         
-        print(f"  Document Types:")
-        for doc_type, data in stats['document_types'].items():
-            if data['count'] > 0:
-                print(f"    - {data['name']}: {data['count']} documents")
-    
-    # Test 8: Test document filtering with date range
-    print("\n8. Testing document filtering with date range...")
-    today = datetime.now().date()
-    yesterday = today - timedelta(days=1)
-    
-    filtered_response = requests.get(
-        f'{BASE_URL}/medical-records/documents/by_type/?type=imaging&date_from={yesterday}&date_to={today}',
-        headers=headers
-    )
-    print(f"Filtered Documents Status: {filtered_response.status_code}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Document Types:")
+            for doc_type, data in stats['document_types'].items():
+                if data['count'] > 0:
+                    logger.debug("    - %s: %s documents", data['name'], data['count'])
+    
+    # Test 7: Test document filtering with date range
+    logger.info("7. Testing document filtering with date range...")
+    filtered_response = responses['date_range']
+    logger.info("Filtered Documents Status: %s", filtered_response.status_code)
     
     if filtered_response.status_code == 200:
         filtered_data = filtered_response.json()
         filtered_docs = filtered_data if isinstance(filtered_data, list) else filtered_data.get('results', [])
-        print(f"✓ Found {len(filtered_docs)} imaging documents from {yesterday} to {today}")
+        logger.info("✓ Found %s imaging documents from %s to %s", len(filtered_docs), yesterday_s, today_s)
     
-    print("\n=== Medical Document Storage Testing Complete ===")
+    logger.info("=== Medical Document Storage Testing Complete ===")
 
 if __name__ == '__main__':
-    test_medical_document_storage()
+    # LOGLEVEL=DEBUG lists individual rows, LOGLEVEL=WARNING leaves only failures
+    logging.basicConfig(format='%(message)s')
+    logger.setLevel(os.environ.get('LOGLEVEL', 'INFO'))
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--medical-record-id', help='Attach the uploads to this record instead of looking one up')
+    args = parser.parse_args()
+    test_medical_document_storage(args.medical_record_id)
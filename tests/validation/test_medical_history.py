@@ -1,37 +1,47 @@
+import hashlib
+import logging
 import os
-import django
-import requests
-from datetime import datetime, timedelta
+import shelve
 
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
-django.setup()
+import orjson
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from _auth import BASE_URL, get_admin_token
+from _http import LAST_RECORD_PATH, conditional_get, gzip_post, new_session, write_last_record_id
+from _payloads import EMPTY_JSON_BODY, JSON_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# Records created by earlier runs, keyed by payload, reused when HMS_TEST_SEED_CACHE=1
+SEED_RECORDS_PATH = LAST_RECORD_PATH.with_name('.pytest_seed_records')
+
+
+def _payload_key(payload):
+    """Stable digest of a create payload and the server it was sent to"""
+    return hashlib.blake2b(
+        orjson.dumps([BASE_URL, payload], option=orjson.OPT_SORT_KEYS), digest_size=16
+    ).hexdigest()
 
-BASE_URL = 'http://localhost:8000/api'
 
 def test_medical_history_management():
-    print("Testing Medical History Management System...")
+    logger.info("Testing Medical History Management System...")
     
-    # Login as admin to have full access
-    login_data = {
-        'email': 'admin@hospital.com',
-        'password': 'admin123'
-    }
+    # One pooled keep-alive session for every call in this test
+    session = new_session()
     
-    login_response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=login_data)
-    print(f"Login Status: {login_response.status_code}")
+    # Login as admin to have full access
+    token = get_admin_token(session)
     
-    if login_response.status_code != 200:
-        print("Login failed!")
-        return
+    if not token:
+        pytest.fail("Login failed!")
     
-    token = login_response.json()['access']
-    headers = {'Authorization': f'Bearer {token}'}
+    session.headers.update({'Authorization': f'Bearer {token}'})
     
-    print("\n=== Testing Medical History Management System ===")
+    logger.info("=== Testing Medical History Management System ===")
     
     # Test 1: Create a medical record
-    print("\n1. Testing medical record creation...")
+    logger.info("1. Testing medical record creation...")
     medical_record_data = {
         'patient': 'bffb1fe9-6506-4806-8eb3-2dfd418da895',  # Patient UUID
         'doctor': '6015915e-8e24-489f-ab61-14c3fc07291d',   # Doctor UUID
@@ -47,179 +57,206 @@ def test_medical_history_management():
         'notes': 'Patient appears anxious about symptoms. Reassured and educated about headache types.'
     }
     
-    create_response = requests.post(
-        f'{BASE_URL}/medical-records/medical-records/',
-        json=medical_record_data,
-        headers=headers
-    )
-    print(f"Create Medical Record Status: {create_response.status_code}")
-    
-    if create_response.status_code == 201:
-        medical_record = create_response.json()
-        record_id = medical_record['id']
-        print(f"✓ Created medical record: {medical_record['record_number']}")
-        print(f"  Patient: {medical_record['patient_name']}")
-        print(f"  Doctor: {medical_record['doctor_name']}")
-        print(f"  Chief Complaint: {medical_record['chief_complaint']}")
-        print(f"  Record Type: {medical_record['record_type']}")
+    use_seed_cache = os.environ.get('HMS_TEST_SEED_CACHE') == '1'
+    payload_key = _payload_key(medical_record_data)
+    
+    record_id = None
+    if use_seed_cache:
+        with shelve.open(str(SEED_RECORDS_PATH)) as seeded:
+            record_id = seeded.get(payload_key)
+    
+    reused_record = record_id is not None
+    if reused_record:
+        logger.info("✓ Reusing medical record from an earlier run: %s", record_id)
     else:
-        print(f"Failed to create medical record: {create_response.text}")
-        return
+        create_response = gzip_post(
+            session,
+            f'{BASE_URL}/medical-records/medical-records/',
+            data=orjson.dumps(medical_record_data),
+            headers=JSON_HEADERS
+        )
+        logger.info("Create Medical Record Status: %s", create_response.status_code)
+        
+        if create_response.status_code == 201:
+            medical_record = orjson.loads(create_response.content)
+            record_id = medical_record['id']
+            write_last_record_id(BASE_URL, record_id)
+            logger.info("✓ Created medical record: %s", medical_record['record_number'])
+            logger.info("  Patient: %s", medical_record['patient_name'])
+            logger.info("  Doctor: %s", medical_record['doctor_name'])
+            logger.info("  Chief Complaint: %s", medical_record['chief_complaint'])
+            logger.info("  Record Type: %s", medical_record['record_type'])
+        else:
+            pytest.fail(f"Failed to create medical record: {create_response.status_code} {create_response.text}")
+        
+        if use_seed_cache:
+            with shelve.open(str(SEED_RECORDS_PATH)) as seeded:
+                seeded[payload_key] = record_id
+    
+    # Reads that only need the new record run concurrently; the detail check
+    # must see it before finalization, statistics must see it after. List
+    # checks ask only for the fields they log
+    read_checks = [
+        ('detail', f'{BASE_URL}/medical-records/medical-records/{record_id}/'),
+        ('list', f'{BASE_URL}/medical-records/medical-records/?fields=record_number,patient_name,record_type'),
+        ('by_patient', f'{BASE_URL}/medical-records/medical-records/?patient_id=P000001&fields=id'),
+        ('history', f'{BASE_URL}/medical-records/medical-records/patient_history/?patient_id=P000001'),
+        ('timeline', f'{BASE_URL}/medical-records/medical-records/timeline/?patient_id=P000001'),
+        ('search', f'{BASE_URL}/medical-records/medical-records/?search=headache&fields=record_number,chief_complaint'),
+    ]
+    
+    def fetch(check):
+        name, url = check
+        return name, session.get(url)
+    
+    with ThreadPoolExecutor(max_workers=len(read_checks)) as executor:
+        responses = dict(executor.map(fetch, read_checks))
     
     # Test 2: Add vital signs to the medical record
-    print("\n2. Testing vital signs addition...")
+    logger.info("2. Testing vital signs addition...")
     # Note: This would require a separate endpoint for vital signs
     # For now, we'll test the medical record retrieval
     
     # Test 3: Get medical record details
-    print("\n3. Testing medical record retrieval...")
-    detail_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/{record_id}/',
-        headers=headers
-    )
-    print(f"Get Medical Record Status: {detail_response.status_code}")
+    logger.info("3. Testing medical record retrieval...")
+    detail_response = responses['detail']
+    logger.info("Get Medical Record Status: %s", detail_response.status_code)
     
     if detail_response.status_code == 200:
-        record_detail = detail_response.json()
-        print(f"✓ Retrieved medical record details")
-        print(f"  Record Number: {record_detail['record_number']}")
-        print(f"  Finalized: {record_detail['is_finalized']}")
-        print(f"  Vital Signs: {len(record_detail['vital_signs'])} records")
-        print(f"  Diagnoses: {len(record_detail['diagnoses'])} records")
-        print(f"  Prescriptions: {len(record_detail['prescriptions'])} records")
-        print(f"  Lab Tests: {len(record_detail['lab_tests'])} records")
-        print(f"  Documents: {len(record_detail['documents'])} records")
+        record_detail = orjson.loads(detail_response.content)
+        logger.info("✓ Retrieved medical record details")
+        logger.info("  Record Number: %s", record_detail['record_number'])
+        logger.info("  Finalized: %s", record_detail['is_finalized'])
+        logger.info("  Vital Signs: %s records", len(record_detail['vital_signs']))
+        logger.info("  Diagnoses: %s records", len(record_detail['diagnoses']))
+        logger.info("  Prescriptions: %s records", len(record_detail['prescriptions']))
+        logger.info("  Lab Tests: %s records", len(record_detail['lab_tests']))
+        logger.info("  Documents: %s records", len(record_detail['documents']))
     else:
-        print(f"Failed to retrieve medical record: {detail_response.text}")
+        logger.warning("Failed to retrieve medical record: %s", detail_response.text)
     
     # Test 4: List medical records with filtering
-    print("\n4. Testing medical records listing and filtering...")
+    logger.info("4. Testing medical records listing and filtering...")
     
     # List all records
-    list_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/',
-        headers=headers
-    )
-    print(f"List Medical Records Status: {list_response.status_code}")
+    list_response = responses['list']
+    logger.info("List Medical Records Status: %s", list_response.status_code)
     
     if list_response.status_code == 200:
-        records_list = list_response.json()
-        print(f"✓ Retrieved {records_list['count']} medical records")
+        records_list = orjson.loads(list_response.content)
+        logger.info("✓ Retrieved %s medical records", records_list['count'])
         
         # Show first few records
-        for record in records_list['results'][:3]:
-            print(f"  - {record['record_number']}: {record['patient_name']} ({record['record_type']})")
+        if logger.isEnabledFor(logging.DEBUG):
+            for record in records_list['results'][:3]:
+                logger.debug("  - %s: %s (%s)", record['record_number'], record['patient_name'], record['record_type'])
     
     # Test filtering by patient
-    patient_filter_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/?patient_id=P000001',
-        headers=headers
-    )
-    print(f"Filter by Patient Status: {patient_filter_response.status_code}")
+    patient_filter_response = responses['by_patient']
+    logger.info("Filter by Patient Status: %s", patient_filter_response.status_code)
     
     if patient_filter_response.status_code == 200:
-        patient_records = patient_filter_response.json()
-        print(f"✓ Found {patient_records['count']} records for patient P000001")
+        patient_records = orjson.loads(patient_filter_response.content)
+        logger.info("✓ Found %s records for patient P000001", patient_records['count'])
     
     # Test 5: Get patient medical history
-    print("\n5. Testing patient medical history...")
-    history_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/patient_history/?patient_id=P000001',
-        headers=headers
-    )
-    print(f"Patient History Status: {history_response.status_code}")
+    logger.info("5. Testing patient medical history...")
+    history_response = responses['history']
+    logger.info("Patient History Status: %s", history_response.status_code)
     
     if history_response.status_code == 200:
-        patient_history = history_response.json()
-        print(f"✓ Retrieved complete medical history")
-        print(f"  Patient: {patient_history['patient']['name']}")
-        print(f"  Date of Birth: {patient_history['patient']['date_of_birth']}")
-        print(f"  Total Records: {patient_history['total_records']}")
+        patient_history = orjson.loads(history_response.content)
+        logger.info("✓ Retrieved complete medical history")
+        logger.info("  Patient: %s", patient_history['patient']['name'])
+        logger.info("  Date of Birth: %s", patient_history['patient']['date_of_birth'])
+        logger.info("  Total Records: %s", patient_history['total_records'])
         
         # Show recent records
-        for record in patient_history['records'][:3]:
-            print(f"  - {record['record_date']}: {record['chief_complaint']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for record in patient_history['records'][:3]:
+                logger.debug("  - %s: %s", record['record_date'], record['chief_complaint'])
     else:
-        print(f"Failed to get patient history: {history_response.text}")
+        logger.warning("Failed to get patient history: %s", history_response.text)
     
     # Test 6: Get medical timeline
-    print("\n6. Testing medical timeline...")
-    timeline_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/timeline/?patient_id=P000001',
-        headers=headers
-    )
-    print(f"Medical Timeline Status: {timeline_response.status_code}")
+    logger.info("6. Testing medical timeline...")
+    timeline_response = responses['timeline']
+    logger.info("Medical Timeline Status: %s", timeline_response.status_code)
     
     if timeline_response.status_code == 200:
-        timeline = timeline_response.json()
-        print(f"✓ Retrieved medical timeline")
-        print(f"  Patient: {timeline['patient']['name']}")
-        print(f"  Total Events: {timeline['total_events']}")
+        timeline = orjson.loads(timeline_response.content)
+        logger.info("✓ Retrieved medical timeline")
+        logger.info("  Patient: %s", timeline['patient']['name'])
+        logger.info("  Total Events: %s", timeline['total_events'])
         
         # Show recent timeline events
-        for event in timeline['timeline'][:5]:
-            print(f"  - {event['date']}: {event['type']} - {event['title']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for event in timeline['timeline'][:5]:
+                logger.debug("  - %s: %s - %s", event['date'], event['type'], event['title'])
     else:
-        print(f"Failed to get medical timeline: {timeline_response.text}")
+        logger.warning("Failed to get medical timeline: %s", timeline_response.text)
     
     # Test 7: Finalize medical record
-    print("\n7. Testing medical record finalization...")
-    finalize_response = requests.post(
+    logger.info("7. Testing medical record finalization...")
+    finalize_response = session.post(
         f'{BASE_URL}/medical-records/medical-records/{record_id}/finalize/',
-        json={},  # Empty JSON body
-        headers=headers
+        data=EMPTY_JSON_BODY,
+        headers=JSON_HEADERS
     )
-    print(f"Finalize Record Status: {finalize_response.status_code}")
+    logger.info("Finalize Record Status: %s", finalize_response.status_code)
     
     if finalize_response.status_code == 200:
-        finalized_record = finalize_response.json()
-        print(f"✓ Medical record finalized")
-        print(f"  Finalized: {finalized_record['is_finalized']}")
-        print(f"  Finalized At: {finalized_record['finalized_at']}")
+        finalized_record = orjson.loads(finalize_response.content)
+        logger.info("✓ Medical record finalized")
+        logger.info("  Finalized: %s", finalized_record['is_finalized'])
+        logger.info("  Finalized At: %s", finalized_record['finalized_at'])
+    elif reused_record:
+        logger.info("  Reused record was finalized on an earlier run")
     else:
-        print(f"Failed to finalize record: {finalize_response.text}")
+        logger.warning("Failed to finalize record: %s", finalize_response.text)
     
     # Test 8: Get medical records statistics
-    print("\n8. Testing medical records statistics...")
-    stats_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/statistics/',
-        headers=headers
+    logger.info("8. Testing medical records statistics...")
+    stats_response = conditional_get(
+        session, f'{BASE_URL}/medical-records/medical-records/statistics/'
     )
-    print(f"Statistics Status: {stats_response.status_code}")
+    logger.info("Statistics Status: %s", stats_response.status_code)
     
     if stats_response.status_code == 200:
-        stats = stats_response.json()
-        print(f"✓ Retrieved medical records statistics")
-        print(f"  Total Records: {stats['total_records']}")
-        print(f"  Finalized Records: {stats['finalized_records']}")
-        print(f"  Pending Records: {stats['pending_records']}")
-        print(f"  Finalization Rate: {stats['finalization_rate']}%")
-        print(f"  Recent Records (30 days): {stats['recent_records_30_days']}")
+        stats = orjson.loads(stats_response.content)
+        logger.info("✓ Retrieved medical records statistics")
+        logger.info("  Total Records: %s", stats['total_records'])
+        logger.info("  Finalized Records: %s", stats['finalized_records'])
+        logger.info("  Pending Records: %s", stats['pending_records'])
+        logger.info("  Finalization Rate: %s%%", stats['finalization_rate'])
+        logger.info("  Recent Records (30 days): %s", stats['recent_records_30_days'])
         
-        print(f"  Record Types:")
-        for record_type, data in stats['record_types'].items():
-            print(f"    - {data['name']}: {data['count']} records")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Record Types:")
+            for record_type, data in stats['record_types'].items():
+                logger.debug("    - %s: %s records", data['name'], data['count'])
     else:
-        print(f"Failed to get statistics: {stats_response.text}")
+        logger.warning("Failed to get statistics: %s", stats_response.text)
     
     # Test 9: Search medical records
-    print("\n9. Testing medical record search...")
-    search_response = requests.get(
-        f'{BASE_URL}/medical-records/medical-records/?search=headache',
-        headers=headers
-    )
-    print(f"Search Status: {search_response.status_code}")
+    logger.info("9. Testing medical record search...")
+    search_response = responses['search']
+    logger.info("Search Status: %s", search_response.status_code)
     
     if search_response.status_code == 200:
-        search_results = search_response.json()
-        print(f"✓ Found {search_results['count']} records matching 'headache'")
+        search_results = orjson.loads(search_response.content)
+        logger.info("✓ Found %s records matching 'headache'", search_results['count'])
         
-        for record in search_results['results'][:3]:
-            print(f"  - {record['record_number']}: {record['chief_complaint']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for record in search_results['results'][:3]:
+                logger.debug("  - %s: %s", record['record_number'], record['chief_complaint'])
     else:
-        print(f"Failed to search records: {search_response.text}")
+        logger.warning("Failed to search records: %s", search_response.text)
     
-    print("\n=== Medical History Management Testing Complete ===")
+    logger.info("=== Medical History Management Testing Complete ===")
 
 if __name__ == '__main__':
+    # LOGLEVEL=DEBUG lists individual rows, LOGLEVEL=WARNING leaves only failures
+    logging.basicConfig(format='%(message)s')
+    logger.setLevel(os.environ.get('LOGLEVEL', 'INFO'))
     test_medical_history_management()
@@ -1,73 +1,70 @@
+import logging
 import os
-import django
+from collections import Counter
 from datetime import datetime, timedelta, time
 
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
-django.setup()
+import pytest
+
+import _django
+
+# Setup Django when run as a script; pytest-django has already done it under pytest
+_django.setup()
 
 from django.utils import timezone
 from notifications.models import (
     NotificationPreference, NotificationSettings, NotificationBlacklist, NotificationSchedule,
     TemplateLanguage
 )
-from notifications.services import NotificationPreferenceService
-from accounts.models import User
-from patients.models import Patient
+from notifications.services import NotificationPreferenceService, PreferenceEvaluator
+
+logger = logging.getLogger(__name__)
 
-def test_notification_preferences_system():
-    print("=== Testing Notification Preferences System ===")
+@pytest.mark.django_db
+def test_notification_preferences_system(actors):
+    logger.info("=== Testing Notification Preferences System ===")
     
     # Get required objects
-    patient = Patient.objects.first()
-    user = patient.user if patient else User.objects.filter(user_type='patient').first()
+    user = actors.user
     
-    print(f'User: {user.get_full_name() if user else "No patient user"}')
+    logger.info("User: %s", user.get_full_name() if user else 'No patient user')
     
     # Test 1: Create default notification settings
-    print('\n1. Creating default notification settings...')
+    logger.info("1. Creating default notification settings...")
     
     preference_service = NotificationPreferenceService()
     
     # Create default settings
     settings = preference_service.create_default_settings(user)
     
-    print(f'✓ Created default settings for {user.get_full_name()}:')
-    print(f'  Notifications enabled: {settings.notifications_enabled}')
-    print(f'  Email enabled: {settings.email_notifications_enabled}')
-    print(f'  SMS enabled: {settings.sms_notifications_enabled}')
-    print(f'  Push enabled: {settings.push_notifications_enabled}')
-    print(f'  In-app enabled: {settings.in_app_notifications_enabled}')
-    print(f'  Primary email: {settings.primary_email}')
-    print(f'  Timezone: {settings.timezone}')
-    print(f'  Default language: {settings.default_language.name if settings.default_language else "None"}')
+    logger.info("✓ Created default settings for %s:", user.get_full_name())
+    logger.info("  Notifications enabled: %s", settings.notifications_enabled)
+    logger.info("  Email enabled: %s", settings.email_notifications_enabled)
+    logger.info("  SMS enabled: %s", settings.sms_notifications_enabled)
+    logger.info("  Push enabled: %s", settings.push_notifications_enabled)
+    logger.info("  In-app enabled: %s", settings.in_app_notifications_enabled)
+    logger.info("  Primary email: %s", settings.primary_email)
+    logger.info("  Timezone: %s", settings.timezone)
+    logger.info("  Default language: %s", settings.default_language.name if settings.default_language else 'None')
+    assert settings.notifications_enabled
     
     # Test 2: Create default notification preferences
-    print('\n2. Creating default notification preferences...')
+    logger.info("2. Creating default notification preferences...")
     
     preferences = preference_service.create_default_preferences(user)
     
-    print(f'✓ Created {len(preferences)} default preferences')
+    logger.info("✓ Created %s default preferences", len(preferences))
+    assert preferences
     
     # Count preferences by channel
-    channel_counts = {}
-    enabled_counts = {}
-    
-    for pref in preferences:
-        channel = pref.channel
-        if channel not in channel_counts:
-            channel_counts[channel] = 0
-            enabled_counts[channel] = 0
-        channel_counts[channel] += 1
-        if pref.is_enabled:
-            enabled_counts[channel] += 1
+    channel_counts = Counter(pref.channel for pref in preferences)
+    enabled_counts = Counter(pref.channel for pref in preferences if pref.is_enabled)
     
     for channel, total in channel_counts.items():
         enabled = enabled_counts[channel]
-        print(f'  {channel.upper()}: {enabled}/{total} enabled')
+        logger.info("  %s: %s/%s enabled", channel.upper(), enabled, total)
     
     # Test 3: Test preference checking
-    print('\n3. Testing preference checking...')
+    logger.info("3. Testing preference checking...")
     
     # Test appointment reminder preferences
     test_cases = [
@@ -79,68 +76,74 @@ def test_notification_preferences_system():
         ('test_results_ready', 'push', 'high'),
     ]
     
+    # One evaluator loads the user's settings and preferences once for every case
+    evaluator = PreferenceEvaluator(user)
+    
     for notification_type, channel, priority in test_cases:
-        should_receive = preference_service.check_user_preference(
-            user=user,
-            notification_type=notification_type,
-            channel=channel,
-            priority=priority
-        )
+        should_receive = evaluator.check(notification_type, channel, priority)
         
-        print(f'✓ {notification_type} via {channel} ({priority}): {should_receive}')
+        logger.info("✓ %s via %s (%s): %s", notification_type, channel, priority, should_receive)
     
-    # Test 4: Create and test blacklist
-    print('\n4. Testing notification blacklist...')
+    # Emergency alerts always get through
+    assert evaluator.check('emergency_alert', 'sms', 'urgent') is True
     
-    # Create blacklist entries
-    email_blacklist = NotificationBlacklist.objects.create(
-        user=user,
-        blacklist_type='email',
-        value='spam@example.com',
-        reason='Spam email address',
-        is_active=True
-    )
-    
-    domain_blacklist = NotificationBlacklist.objects.create(
-        user=user,
-        blacklist_type='domain',
-        value='marketing.com',
-        reason='Marketing domain',
-        is_active=True
-    )
+    # Test 4: Create and test blacklist
+    logger.info("4. Testing notification blacklist...")
     
-    phone_blacklist = NotificationBlacklist.objects.create(
-        user=user,
-        blacklist_type='phone',
-        value='+1234567890',
-        reason='Unwanted calls',
-        is_active=True
-    )
+    # Create blacklist entries in one INSERT; entries left by an earlier run are kept
+    email_blacklist, domain_blacklist, phone_blacklist = NotificationBlacklist.objects.bulk_create([
+        NotificationBlacklist(
+            user=user,
+            blacklist_type='email',
+            value='spam@example.com',
+            reason='Spam email address',
+            is_active=True
+        ),
+        NotificationBlacklist(
+            user=user,
+            blacklist_type='domain',
+            value='marketing.com',
+            reason='Marketing domain',
+            is_active=True
+        ),
+        NotificationBlacklist(
+            user=user,
+            blacklist_type='phone',
+            value='+1234567890',
+            reason='Unwanted calls',
+            is_active=True
+        ),
+    ], ignore_conflicts=True)
     
-    print(f'✓ Created email blacklist: {email_blacklist.value}')
-    print(f'✓ Created domain blacklist: {domain_blacklist.value}')
-    print(f'✓ Created phone blacklist: {phone_blacklist.value}')
+    logger.info("✓ Created email blacklist: %s", email_blacklist.value)
+    logger.info("✓ Created domain blacklist: %s", domain_blacklist.value)
+    logger.info("✓ Created phone blacklist: %s", phone_blacklist.value)
     
     # Test blacklist checking
-    test_contacts = [
-        ('spam@example.com', 'email'),
-        ('user@marketing.com', 'email'),
-        ('valid@hospital.com', 'email'),
-        ('+1234567890', 'phone'),
-        ('+1987654321', 'phone'),
-    ]
-    
-    for contact, contact_type in test_contacts:
+    test_contacts = {
+        ('spam@example.com', 'email'): True,
+        ('user@marketing.com', 'email'): True,
+        ('valid@hospital.com', 'email'): False,
+        ('+1234567890', 'phone'): True,
+        ('+1987654321', 'phone'): False,
+    }
+    
+    # Load the blacklist once and check every contact against it in memory
+    blacklist = preference_service.load_blacklist(user)
+    
+    for (contact, contact_type), expected in test_contacts.items():
         is_blacklisted = preference_service.is_blacklisted(
             user=user,
             contact_info=contact,
-            blacklist_type=contact_type
+            blacklist_type=contact_type,
+            blacklist=blacklist
         )
         
-        print(f'✓ {contact} ({contact_type}): {"BLACKLISTED" if is_blacklisted else "ALLOWED"}')
+        logger.info("✓ %s (%s): %s", contact, contact_type, 'BLACKLISTED' if is_blacklisted else 'ALLOWED')
+        assert is_blacklisted == expected, contact
     
     # Test 5: Test language preferences
-    print('\n5. Testing language preferences...')
+    logger.info("5. Testing language preferences...")
     
     # Get user language for different notification types
     language_tests = [
@@ -156,10 +159,10 @@ def test_notification_preferences_system():
             notification_type=notification_type
         )
         
-        print(f'✓ {notification_type}: {user_language}')
+        logger.info("✓ %s: %s", notification_type, user_language)
     
     # Test 6: Create and test custom schedules
-    print('\n6. Testing custom notification schedules...')
+    logger.info("6. Testing custom notification schedules...")
     
     # Create business hours schedule
     business_schedule = NotificationSchedule.objects.create(
@@ -189,14 +192,14 @@ def test_notification_preferences_system():
         priority=2  # Higher priority
     )
     
-    print(f'✓ Created business hours schedule: {business_schedule.name}')
-    print(f'  Time: {business_schedule.start_time} - {business_schedule.end_time}')
-    print(f'  Days: {business_schedule.days_of_week}')
-    print(f'  Types: {business_schedule.notification_types}')
+    logger.info("✓ Created business hours schedule: %s", business_schedule.name)
+    logger.info("  Time: %s - %s", business_schedule.start_time, business_schedule.end_time)
+    logger.info("  Days: %s", business_schedule.days_of_week)
+    logger.info("  Types: %s", business_schedule.notification_types)
     
-    print(f'✓ Created emergency schedule: {emergency_schedule.name}')
-    print(f'  Priority: {emergency_schedule.priority}')
-    print(f'  Types: {emergency_schedule.notification_types}')
+    logger.info("✓ Created emergency schedule: %s", emergency_schedule.name)
+    logger.info("  Priority: %s", emergency_schedule.priority)
+    logger.info("  Types: %s", emergency_schedule.notification_types)
     
     # Test schedule checking
     schedule_tests = [
@@ -206,16 +209,16 @@ def test_notification_preferences_system():
         'test_results_ready'
     ]
     
+    # Fresh evaluator so the schedules created above are loaded
+    schedule_evaluator = PreferenceEvaluator(user)
+    
     for notification_type in schedule_tests:
-        should_send = preference_service.should_send_during_schedule(
-            user=user,
-            notification_type=notification_type
-        )
+        should_send = schedule_evaluator.should_send_now(notification_type)
         
-        print(f'✓ {notification_type} schedule check: {should_send}')
+        logger.info("✓ %s schedule check: %s", notification_type, should_send)
     
     # Test 7: Update notification settings
-    print('\n7. Testing notification settings updates...')
+    logger.info("7. Testing notification settings updates...")
     
     # Update settings
     settings.global_quiet_hours_enabled = True
@@ -227,84 +230,91 @@ def test_notification_preferences_system():
     settings.marketing_emails_enabled = False
     settings.save()
     
-    print(f'✓ Updated notification settings:')
-    print(f'  Quiet hours: {settings.global_quiet_hours_start} - {settings.global_quiet_hours_end}')
-    print(f'  Weekend notifications: {settings.weekend_notifications_enabled}')
-    print(f'  Daily digest: {settings.daily_digest_enabled} at {settings.daily_digest_time}')
-    print(f'  Marketing emails: {settings.marketing_emails_enabled}')
+    logger.info("✓ Updated notification settings:")
+    logger.info("  Quiet hours: %s - %s", settings.global_quiet_hours_start, settings.global_quiet_hours_end)
+    logger.info("  Weekend notifications: %s", settings.weekend_notifications_enabled)
+    logger.info("  Daily digest: %s at %s", settings.daily_digest_enabled, settings.daily_digest_time)
+    logger.info("  Marketing emails: %s", settings.marketing_emails_enabled)
     
     # Test 8: Update specific preferences
-    print('\n8. Testing preference updates...')
+    logger.info("8. Testing preference updates...")
     
-    # Update some preferences
-    appointment_email_pref = NotificationPreference.objects.get(
-        user=user,
-        notification_type='appointment_reminder',
-        channel='email'
-    )
+    # Load the user's preferences once, change them in memory and write back together
+    user_preferences = {
+        (pref.notification_type, pref.channel): pref
+        for pref in NotificationPreference.objects.filter(user=user)
+    }
+    
+    appointment_email_pref = user_preferences[('appointment_reminder', 'email')]
     appointment_email_pref.frequency = 'daily_digest'
     appointment_email_pref.priority_threshold = 'high'
     appointment_email_pref.quiet_hours_start = time(21, 0)  # 9:00 PM
     appointment_email_pref.quiet_hours_end = time(8, 0)     # 8:00 AM
-    appointment_email_pref.save()
     
-    marketing_email_pref = NotificationPreference.objects.get(
-        user=user,
-        notification_type='marketing',
-        channel='email'
-    )
+    marketing_email_pref = user_preferences[('marketing', 'email')]
     marketing_email_pref.is_enabled = False
-    marketing_email_pref.save()
     
-    print(f'✓ Updated appointment reminder email preference:')
-    print(f'  Frequency: {appointment_email_pref.frequency}')
-    print(f'  Priority threshold: {appointment_email_pref.priority_threshold}')
-    print(f'  Quiet hours: {appointment_email_pref.quiet_hours_start} - {appointment_email_pref.quiet_hours_end}')
+    # bulk_update skips auto_now, so stamp updated_at explicitly
+    updated_preferences = [appointment_email_pref, marketing_email_pref]
+    for pref in updated_preferences:
+        pref.updated_at = timezone.now()
+    NotificationPreference.objects.bulk_update(
+        updated_preferences,
+        ['frequency', 'priority_threshold', 'quiet_hours_start', 'quiet_hours_end', 'is_enabled', 'updated_at']
+    )
+    
+    logger.info("✓ Updated appointment reminder email preference:")
+    logger.info("  Frequency: %s", appointment_email_pref.frequency)
+    logger.info("  Priority threshold: %s", appointment_email_pref.priority_threshold)
+    logger.info("  Quiet hours: %s - %s", appointment_email_pref.quiet_hours_start, appointment_email_pref.quiet_hours_end)
+    
+    logger.info("✓ Disabled marketing email preference")
     
-    print(f'✓ Disabled marketing email preference')
+    stored = NotificationPreference.objects.get(pk=appointment_email_pref.pk)
+    assert (stored.frequency, stored.priority_threshold) == ('daily_digest', 'high')
+    assert not NotificationPreference.objects.get(pk=marketing_email_pref.pk).is_enabled
     
     # Test 9: System statistics
-    print('\n9. System statistics...')
+    logger.info("9. System statistics...")
     
-    total_preferences = NotificationPreference.objects.filter(user=user).count()
-    enabled_preferences = NotificationPreference.objects.filter(user=user, is_enabled=True).count()
+    # Statistics come from the preferences already loaded for test 8
+    total_preferences = len(user_preferences)
+    enabled_preferences = sum(pref.is_enabled for pref in user_preferences.values())
     disabled_preferences = total_preferences - enabled_preferences
     
     total_blacklist = NotificationBlacklist.objects.filter(user=user, is_active=True).count()
     total_schedules = NotificationSchedule.objects.filter(user=user, is_active=True).count()
     
-    print(f'✓ Notification preferences statistics:')
-    print(f'  Total preferences: {total_preferences}')
-    print(f'  Enabled preferences: {enabled_preferences}')
-    print(f'  Disabled preferences: {disabled_preferences}')
-    print(f'  Active blacklist entries: {total_blacklist}')
-    print(f'  Custom schedules: {total_schedules}')
-    
-    # Preference breakdown by type
-    preference_types = {}
-    for pref in NotificationPreference.objects.filter(user=user):
-        pref_type = pref.notification_type
-        if pref_type not in preference_types:
-            preference_types[pref_type] = {'total': 0, 'enabled': 0}
-        preference_types[pref_type]['total'] += 1
-        if pref.is_enabled:
-            preference_types[pref_type]['enabled'] += 1
-    
-    print(f'  Preference breakdown by type:')
-    for pref_type, counts in preference_types.items():
-        print(f'    {pref_type}: {counts["enabled"]}/{counts["total"]} enabled')
+    logger.info("✓ Notification preferences statistics:")
+    logger.info("  Total preferences: %s", total_preferences)
+    logger.info("  Enabled preferences: %s", enabled_preferences)
+    logger.info("  Disabled preferences: %s", disabled_preferences)
+    logger.info("  Active blacklist entries: %s", total_blacklist)
+    logger.info("  Custom schedules: %s", total_schedules)
+    assert total_blacklist >= 3
+    assert total_schedules >= 2
+    assert disabled_preferences >= 1
+    
+    # Preference breakdown by type, only built when it will be shown
+    if logger.isEnabledFor(logging.DEBUG):
+        type_totals = Counter(pref.notification_type for pref in user_preferences.values())
+        type_enabled = Counter(
+            pref.notification_type for pref in user_preferences.values() if pref.is_enabled
+        )
+        
+        logger.debug("  Preference breakdown by type:")
+        for pref_type, total in type_totals.items():
+            logger.debug("    %s: %s/%s enabled", pref_type, type_enabled[pref_type], total)
     
     # Channel breakdown
-    channel_breakdown = {}
-    for pref in NotificationPreference.objects.filter(user=user, is_enabled=True):
-        channel = pref.channel
-        if channel not in channel_breakdown:
-            channel_breakdown[channel] = 0
-        channel_breakdown[channel] += 1
+    channel_breakdown = Counter(pref.channel for pref in user_preferences.values() if pref.is_enabled)
     
-    print(f'  Enabled preferences by channel: {channel_breakdown}')
+    logger.info("  Enabled preferences by channel: %s", dict(channel_breakdown))
     
-    print('\n=== Notification Preferences System Testing Complete ===')
+    logger.info("=== Notification Preferences System Testing Complete ===")
 
 if __name__ == '__main__':
-    test_notification_preferences_system()
+    # LOGLEVEL=DEBUG adds the per-type breakdown, LOGLEVEL=WARNING silences the run
+    logging.basicConfig(format='%(message)s')
+    logger.setLevel(os.environ.get('LOGLEVEL', 'INFO'))
+    test_notification_preferences_system(_django.load_actors())
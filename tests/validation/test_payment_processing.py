@@ -1,98 +1,86 @@
-import os
-import django
-import requests
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_backend.settings')
-django.setup()
+import orjson
+import pytest
 
-BASE_URL = 'http://localhost:8000/api'
+from _auth import BASE_URL
+from _http import do_request
 
-def test_payment_processing_system():
-    print("Testing Payment Processing System...")
-    
-    # Login as admin to have full access
-    login_data = {
-        'email': 'admin@hospital.com',
-        'password': 'admin123'
-    }
-    
-    login_response = requests.post(f'{BASE_URL}/accounts/auth/login/', json=login_data)
-    print(f"Login Status: {login_response.status_code}")
-    
-    if login_response.status_code != 200:
-        print("Login failed!")
-        return
-    
-    token = login_response.json()['access']
-    headers = {'Authorization': f'Bearer {token}'}
+logger = logging.getLogger(__name__)
+
+# Endpoints built once at import; detail templates are filled with .format(id=...)
+PATIENTS_URL = f'{BASE_URL}/patients/patients/'
+SERVICES_URL = f'{BASE_URL}/billing/services/'
+INVOICES_URL = f'{BASE_URL}/billing/invoices/'
+INVOICE_DETAIL_URL = INVOICES_URL + '{id}/'
+PAYMENTS_URL = f'{BASE_URL}/billing/payments/'
+PAYMENTS_BY_INVOICE_URL = f'{PAYMENTS_URL}by_invoice/'
+PAYMENT_STATS_URL = f'{PAYMENTS_URL}statistics/'
+PAYMENT_REFUND_URL = PAYMENTS_URL + '{id}/refund/'
+
+
+def test_payment_processing_system(auth_session):
+    logger.info("Testing Payment Processing System...")
     
-    print("\n=== Testing Payment Processing System ===")
+    logger.info("=== Testing Payment Processing System ===")
     
     # First, get an existing invoice to process payment for
-    print("\n0. Getting existing invoice for payment processing...")
-    invoices_response = requests.get(f'{BASE_URL}/billing/invoices/', headers=headers)
+    logger.info("0. Getting existing invoice for payment processing...")
+    # Let the server pick the first invoice that is not fully paid
+    invoices_response = auth_session.get(
+        INVOICES_URL,
+        params={'status__in': 'sent,draft,partially_paid', 'page_size': 1},
+    )
     if invoices_response.status_code == 200:
-        invoices_data = invoices_response.json()
-        invoices = invoices_data if isinstance(invoices_data, list) else invoices_data.get('results', [])
+        invoices = orjson.loads(invoices_response.content)['results']
         if invoices:
-            # Find an invoice that's not fully paid
-            unpaid_invoice = None
-            for invoice in invoices:
-                if invoice['status'] in ['sent', 'draft', 'partially_paid']:
-                    unpaid_invoice = invoice
-                    break
+            unpaid_invoice = invoices[0]
+            invoice_id = unpaid_invoice['id']
+            invoice_number = unpaid_invoice['invoice_number']
+            total_amount = float(unpaid_invoice['total_amount'])
+            logger.info("✓ Using invoice: %s ($%s)", invoice_number, total_amount)
+        else:
+            logger.info("No unpaid invoices found. Creating a new one...")
+            # Create a simple invoice for testing
+            patient_response = auth_session.get(PATIENTS_URL)
+            patient_id = orjson.loads(patient_response.content)['results'][0]['id']
+            service_response = auth_session.get(SERVICES_URL)
+            service_id = orjson.loads(service_response.content)[0]['id']
             
-            if unpaid_invoice:
-                invoice_id = unpaid_invoice['id']
-                invoice_number = unpaid_invoice['invoice_number']
-                total_amount = float(unpaid_invoice['total_amount'])
-                print(f"✓ Using invoice: {invoice_number} (${total_amount})")
+            today = datetime.now().date()
+            invoice_data = {
+                'patient': patient_id,
+                'invoice_date': today.isoformat(),
+                'due_date': (today + timedelta(days=30)).isoformat(),
+                'tax_amount': '0.00',
+                'discount_amount': '0.00',
+                'notes': 'Test invoice for payment processing',
+                'items': [{
+                    'service': service_id,
+                    'description': 'Test service for payment',
+                    'quantity': 1,
+                    'unit_price': '100.00',
+                    'discount_amount': '0.00'
+                }]
+            }
+            
+            create_invoice_response = auth_session.post(INVOICES_URL, json=invoice_data)
+            if create_invoice_response.status_code == 201:
+                new_invoice = orjson.loads(create_invoice_response.content)
+                invoice_id = new_invoice['id']
+                invoice_number = new_invoice['invoice_number']
+                total_amount = float(new_invoice['total_amount'])
+                logger.info("✓ Created new invoice: %s ($%s)", invoice_number, total_amount)
             else:
-                print("No unpaid invoices found. Creating a new one...")
-                # Create a simple invoice for testing
-                patient_response = requests.get(f'{BASE_URL}/patients/patients/', headers=headers)
-                patient_id = patient_response.json()['results'][0]['id']
-                service_response = requests.get(f'{BASE_URL}/billing/services/', headers=headers)
-                service_id = service_response.json()[0]['id']
-                
-                today = datetime.now().date()
-                invoice_data = {
-                    'patient': patient_id,
-                    'invoice_date': today.isoformat(),
-                    'due_date': (today + timedelta(days=30)).isoformat(),
-                    'tax_amount': '0.00',
-                    'discount_amount': '0.00',
-                    'notes': 'Test invoice for payment processing',
-                    'items': [{
-                        'service': service_id,
-                        'description': 'Test service for payment',
-                        'quantity': 1,
-                        'unit_price': '100.00',
-                        'discount_amount': '0.00'
-                    }]
-                }
-                
-                create_invoice_response = requests.post(f'{BASE_URL}/billing/invoices/', json=invoice_data, headers=headers)
-                if create_invoice_response.status_code == 201:
-                    new_invoice = create_invoice_response.json()
-                    invoice_id = new_invoice['id']
-                    invoice_number = new_invoice['invoice_number']
-                    total_amount = float(new_invoice['total_amount'])
-                    print(f"✓ Created new invoice: {invoice_number} (${total_amount})")
-                else:
-                    print("Failed to create test invoice")
-                    return
-        else:
-            print("No invoices found")
-            return
+                pytest.fail("Failed to create test invoice")
     else:
-        print("Failed to get invoices")
-        return
+        pytest.fail("Failed to get invoices")
     
     # Test 1: Create a full payment
-    print("\n1. Testing full payment processing...")
+    logger.info("1. Testing full payment processing...")
     payment_data = {
         'invoice': invoice_id,
         'amount': str(total_amount),
@@ -103,106 +91,109 @@ def test_payment_processing_system():
         'notes': 'Full payment via credit card'
     }
     
-    create_payment_response = requests.post(
-        f'{BASE_URL}/billing/payments/',
-        json=payment_data,
-        headers=headers
+    create_payment_response = auth_session.post(
+        PAYMENTS_URL,
+        json=payment_data
     )
-    print(f"Create Payment Status: {create_payment_response.status_code}")
+    logger.info("Create Payment Status: %s", create_payment_response.status_code)
     
     if create_payment_response.status_code == 201:
-        payment = create_payment_response.json()
+        payment = orjson.loads(create_payment_response.content)
         payment_id = payment['id']
         payment_number = payment['payment_number']
-        print(f"✓ Created payment: {payment_number}")
-        print(f"  Amount: ${payment['amount']}")
-        print(f"  Method: {payment['payment_method']}")
-        print(f"  Status: {payment['status']}")
-        print(f"  Transaction ID: {payment['transaction_id']}")
+        logger.info("✓ Created payment: %s", payment_number)
+        logger.info("  Amount: $%s", payment['amount'])
+        logger.info("  Method: %s", payment['payment_method'])
+        logger.info("  Status: %s", payment['status'])
+        logger.info("  Transaction ID: %s", payment['transaction_id'])
     else:
-        print(f"Failed to create payment: {create_payment_response.text}")
-        return
+        pytest.fail(f"Failed to create payment: {create_payment_response.status_code} {create_payment_response.text}")
+    
+    # The payment listing and invoice history only read the payment created above and
+    # nothing writes until the refund, so fetch both at once and report them in order
+    read_checks = [
+        ('list', 'GET', PAYMENTS_URL, None),
+        ('by_invoice', 'GET', PAYMENTS_BY_INVOICE_URL, {'invoice_id': invoice_id}),
+    ]
+    with ThreadPoolExecutor(max_workers=len(read_checks)) as executor:
+        responses = dict(executor.map(partial(do_request, auth_session), read_checks))
     
     # Test 2: List all payments
-    print("\n2. Testing payment listing...")
-    list_payments_response = requests.get(f'{BASE_URL}/billing/payments/', headers=headers)
-    print(f"List Payments Status: {list_payments_response.status_code}")
+    logger.info("2. Testing payment listing...")
+    list_payments_response = responses['list']
+    logger.info("List Payments Status: %s", list_payments_response.status_code)
     
     if list_payments_response.status_code == 200:
-        payments_data = list_payments_response.json()
+        payments_data = orjson.loads(list_payments_response.content)
         payments_list = payments_data if isinstance(payments_data, list) else payments_data.get('results', [])
-        print(f"✓ Retrieved {len(payments_list)} payments")
+        logger.info("✓ Retrieved %s payments", len(payments_list))
         
         for payment in payments_list[:3]:
-            print(f"  - {payment['payment_number']}: ${payment['amount']} ({payment['status']})")
+            logger.info("  - %s: $%s (%s)", payment['payment_number'], payment['amount'], payment['status'])
     
     # Test 3: Get payments by invoice
-    print("\n3. Testing payments by invoice...")
-    invoice_payments_response = requests.get(
-        f'{BASE_URL}/billing/payments/by_invoice/?invoice_id={invoice_id}',
-        headers=headers
-    )
-    print(f"Invoice Payments Status: {invoice_payments_response.status_code}")
+    logger.info("3. Testing payments by invoice...")
+    invoice_payments_response = responses['by_invoice']
+    logger.info("Invoice Payments Status: %s", invoice_payments_response.status_code)
     
     if invoice_payments_response.status_code == 200:
-        invoice_payments = invoice_payments_response.json()
-        print(f"✓ Retrieved invoice payment history")
-        print(f"  Invoice: {invoice_payments['invoice']['invoice_number']}")
-        print(f"  Total Amount: ${invoice_payments['invoice']['total_amount']}")
-        print(f"  Paid Amount: ${invoice_payments['invoice']['paid_amount']}")
-        print(f"  Balance Due: ${invoice_payments['invoice']['balance_due']}")
-        print(f"  Total Payments: {invoice_payments['total_payments']}")
+        invoice_payments = orjson.loads(invoice_payments_response.content)
+        logger.info("✓ Retrieved invoice payment history")
+        logger.info("  Invoice: %s", invoice_payments['invoice']['invoice_number'])
+        logger.info("  Total Amount: $%s", invoice_payments['invoice']['total_amount'])
+        logger.info("  Paid Amount: $%s", invoice_payments['invoice']['paid_amount'])
+        logger.info("  Balance Due: $%s", invoice_payments['invoice']['balance_due'])
+        logger.info("  Total Payments: %s", invoice_payments['total_payments'])
         
         if invoice_payments['payment_summary']:
             summary = invoice_payments['payment_summary']
-            print(f"  Payment Summary:")
-            print(f"    Total Amount: ${summary['total_amount']}")
-            print(f"    Net Amount: ${summary['net_amount']}")
-            print(f"    Method Counts: {summary['method_counts']}")
+            logger.info("  Payment Summary:")
+            logger.info("    Total Amount: $%s", summary['total_amount'])
+            logger.info("    Net Amount: $%s", summary['net_amount'])
+            logger.info("    Method Counts: %s", summary['method_counts'])
     
     # Test 4: Process a partial refund
-    print("\n4. Testing payment refund...")
+    logger.info("4. Testing payment refund...")
     refund_amount = total_amount / 2  # Refund half the amount
     refund_data = {
         'amount': str(refund_amount),
         'reason': 'Partial service cancellation'
     }
     
-    refund_response = requests.post(
-        f'{BASE_URL}/billing/payments/{payment_id}/refund/',
-        json=refund_data,
-        headers=headers
+    refund_response = auth_session.post(
+        PAYMENT_REFUND_URL.format(id=payment_id),
+        json=refund_data
     )
-    print(f"Refund Status: {refund_response.status_code}")
+    logger.info("Refund Status: %s", refund_response.status_code)
     
     if refund_response.status_code == 200:
-        refund_result = refund_response.json()
-        print(f"✓ Refund processed successfully")
-        print(f"  Refund Amount: ${refund_amount}")
-        print(f"  Refund Payment Number: {refund_result['refund_payment']['payment_number']}")
-        print(f"  Original Payment Status: {refund_result['original_payment']['status']}")
+        refund_result = orjson.loads(refund_response.content)
+        logger.info("✓ Refund processed successfully")
+        logger.info("  Refund Amount: $%s", refund_amount)
+        logger.info("  Refund Payment Number: %s", refund_result['refund_payment']['payment_number'])
+        logger.info("  Original Payment Status: %s", refund_result['original_payment']['status'])
     else:
-        print(f"Failed to process refund: {refund_response.text}")
+        logger.warning("Failed to process refund: %s", refund_response.text)
     
     # Test 5: Get payment statistics
-    print("\n5. Testing payment statistics...")
-    stats_response = requests.get(f'{BASE_URL}/billing/payments/statistics/', headers=headers)
-    print(f"Payment Statistics Status: {stats_response.status_code}")
+    logger.info("5. Testing payment statistics...")
+    stats_response = auth_session.get(PAYMENT_STATS_URL)
+    logger.info("Payment Statistics Status: %s", stats_response.status_code)
     
     if stats_response.status_code == 200:
-        stats = stats_response.json()
-        print(f"✓ Retrieved payment statistics")
-        print(f"  Total Payments: {stats['total_payments']}")
-        print(f"  Total Amount: ${stats['total_amount']}")
-        print(f"  Total Refunds: ${stats['total_refunds']}")
-        print(f"  Net Amount: ${stats['net_amount']}")
-        print(f"  Recent Payments (30 days): {stats['recent_payments_30_days']}")
-        print(f"  Average Payment: ${stats['average_payment_amount']:.2f}")
-        print(f"  Status Breakdown: {stats['status_breakdown']}")
-        print(f"  Payment Method Breakdown: {stats['payment_method_breakdown']}")
+        stats = orjson.loads(stats_response.content)
+        logger.info("✓ Retrieved payment statistics")
+        logger.info("  Total Payments: %s", stats['total_payments'])
+        logger.info("  Total Amount: $%s", stats['total_amount'])
+        logger.info("  Total Refunds: $%s", stats['total_refunds'])
+        logger.info("  Net Amount: $%s", stats['net_amount'])
+        logger.info("  Recent Payments (30 days): %s", stats['recent_payments_30_days'])
+        logger.info("  Average Payment: $%.2f", stats['average_payment_amount'])
+        logger.info("  Status Breakdown: %s", stats['status_breakdown'])
+        logger.info("  Payment Method Breakdown: %s", stats['payment_method_breakdown'])
     
     # Test 6: Create another payment to test partial payments
-    print("\n6. Testing partial payment processing...")
+    logger.info("6. Testing partial payment processing...")
     partial_amount = total_amount / 4  # Pay 25% of remaining balance
     partial_payment_data = {
         'invoice': invoice_id,
@@ -214,33 +205,32 @@ def test_payment_processing_system():
         'notes': 'Partial payment via bank transfer'
     }
     
-    create_partial_response = requests.post(
-        f'{BASE_URL}/billing/payments/',
-        json=partial_payment_data,
-        headers=headers
+    create_partial_response = auth_session.post(
+        PAYMENTS_URL,
+        json=partial_payment_data
     )
-    print(f"Create Partial Payment Status: {create_partial_response.status_code}")
+    logger.info("Create Partial Payment Status: %s", create_partial_response.status_code)
     
     if create_partial_response.status_code == 201:
-        partial_payment = create_partial_response.json()
-        print(f"✓ Created partial payment: {partial_payment['payment_number']}")
-        print(f"  Amount: ${partial_payment['amount']}")
-        print(f"  Method: {partial_payment['payment_method']}")
+        partial_payment = orjson.loads(create_partial_response.content)
+        logger.info("✓ Created partial payment: %s", partial_payment['payment_number'])
+        logger.info("  Amount: $%s", partial_payment['amount'])
+        logger.info("  Method: %s", partial_payment['payment_method'])
     
     # Test 7: Check updated invoice status
-    print("\n7. Testing updated invoice status...")
-    updated_invoice_response = requests.get(f'{BASE_URL}/billing/invoices/{invoice_id}/', headers=headers)
+    logger.info("7. Testing updated invoice status...")
+    updated_invoice_response = auth_session.get(INVOICE_DETAIL_URL.format(id=invoice_id))
     if updated_invoice_response.status_code == 200:
-        updated_invoice = updated_invoice_response.json()
-        print(f"✓ Retrieved updated invoice status")
-        print(f"  Invoice Status: {updated_invoice['status']}")
-        print(f"  Total Amount: ${updated_invoice['total_amount']}")
-        print(f"  Paid Amount: ${updated_invoice['paid_amount']}")
-        print(f"  Balance Due: ${updated_invoice['balance_due']}")
-        print(f"  Is Overdue: {updated_invoice['is_overdue']}")
+        updated_invoice = orjson.loads(updated_invoice_response.content)
+        logger.info("✓ Retrieved updated invoice status")
+        logger.info("  Invoice Status: %s", updated_invoice['status'])
+        logger.info("  Total Amount: $%s", updated_invoice['total_amount'])
+        logger.info("  Paid Amount: $%s", updated_invoice['paid_amount'])
+        logger.info("  Balance Due: $%s", updated_invoice['balance_due'])
+        logger.info("  Is Overdue: %s", updated_invoice['is_overdue'])
     
     # Test 8: Test payment method validation
-    print("\n8. Testing payment validation...")
+    logger.info("8. Testing payment validation...")
     invalid_payment_data = {
         'invoice': invoice_id,
         'amount': '-50.00',  # Invalid negative amount
@@ -248,18 +238,14 @@ def test_payment_processing_system():
         'status': 'completed'
     }
     
-    invalid_payment_response = requests.post(
-        f'{BASE_URL}/billing/payments/',
-        json=invalid_payment_data,
-        headers=headers
+    invalid_payment_response = auth_session.post(
+        PAYMENTS_URL,
+        json=invalid_payment_data
     )
-    print(f"Invalid Payment Status: {invalid_payment_response.status_code}")
+    logger.info("Invalid Payment Status: %s", invalid_payment_response.status_code)
     if invalid_payment_response.status_code == 400:
-        print("✓ Properly rejected invalid payment amount")
+        logger.info("✓ Properly rejected invalid payment amount")
     else:
-        print(f"Unexpected response: {invalid_payment_response.text}")
+        logger.warning("Unexpected response: %s", invalid_payment_response.text)
     
-    print("\n=== Payment Processing System Testing Complete ===")
-
-if __name__ == '__main__':
-    test_payment_processing_system()
+    logger.info("=== Payment Processing System Testing Complete ===")
@@ -1,8 +1,34 @@
-import requests
-import tempfile
+import atexit
+import glob
 import os
+import shutil
+import tempfile
+import time
+
+import requests
+
+from _auth import BASE_URL
+
+TMP_PREFIX = 'hospital_tests_'
+
+# Directories older than this were left behind by a run that was killed
+STALE_TMP_SECONDS = 60 * 60
+
+
+def _sweep_stale_tmp_dirs():
+    cutoff = time.time() - STALE_TMP_SECONDS
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f'{TMP_PREFIX}*')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
 
-BASE_URL = 'http://localhost:8000/api'
+# atexit does not run on SIGKILL, so each run also sweeps what earlier runs left
+_sweep_stale_tmp_dirs()
+TMP_DIR = tempfile.mkdtemp(prefix=TMP_PREFIX)
+atexit.register(shutil.rmtree, TMP_DIR, ignore_errors=True)
 
 # Login
 login_data = {'email': 'admin@hospital.com', 'password': 'admin123'}
@@ -17,7 +43,7 @@ print(f'Using medical record: {medical_record_id}')
 
 # Create a simple test file
 test_content = "This is a test lab report file."
-temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
+temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', dir=TMP_DIR, delete=False)
 temp_file.write(test_content)
 temp_file.close()
 